@@ -0,0 +1,1840 @@
+#Author-ortus
+#Description-Converts extracted geometry into SVG, independent of Fusion360
+
+import math
+import os
+import io
+import gzip
+import re
+import string
+import struct
+import zlib
+import concurrent.futures
+
+
+# Curve records are tuples of plain floats in Fusion units (cm), y pointing up:
+# ("line", start x, start y, end x, end y)
+# ("arc", center x, center y, radius, start x, start y, end x, end y, sweep)
+# ("circle", center x, center y, radius)
+# ("ellipse", center x, center y, major radius, minor radius, major axis x, major axis y)
+# ("ellarc", center x, center y, major radius, minor radius, major axis x, major axis y, start x, start y, end x, end y, sweep)
+# ("nurbs", x0, y0, x1, y1, ...) approximated by straight line segments
+# Sweeps are in radians, positive counterclockwise.
+#
+# A loop is a dict {"isOuter": bool, "area": float, "curves": [(record, invert), ...]}
+# with the curves lined up end to end in the order they are emitted, see orientLoop.
+# An entity is a dict {"group": int, "name": str, "closed": bool, "loops": [loop, ...]}
+# Loops of closed entities (bodies) are joined into one path,
+# other entities (sketch curves) get one path per loop.
+CURVE_TYPES = ["line", "arc", "circle", "ellipse", "ellarc", "nurbs"]
+CLOSED_CURVE_TYPES = ["circle", "ellipse"]
+
+ORDER_SELECTION = "selection"
+ORDER_INNER_FIRST = "inner-first"
+ORDER_AREA = "smallest-first"
+ORDERINGS = [ORDER_SELECTION, ORDER_INNER_FIRST, ORDER_AREA]
+
+OUTPUT_SINGLE_FILE = "Single file"
+OUTPUT_PER_COLOR = "One file per color"
+OUTPUT_PER_BODY = "One file per body"
+
+# Placeholders filled in by getBatches and writeTiles, besides the ones passed by the caller
+BATCH_TEMPLATE_FIELDS = ["group", "name", "index"]
+TILE_TEMPLATE_FIELDS = ["group", "name", "index", "row", "column"]
+
+RECORDING_EXTENSION = ".svgrec"
+RECORDING_MAGIC = b"SVGR"
+RECORDING_VERSION = 1
+
+# NURBS subdivided into more points are reported by the preflight
+NURBS_WARNING_POINTS = 10000
+
+# NURBS are not subdivided into more points than this
+NURBS_MAX_POINTS = 100000
+
+# Size of the canvas of an empty export in cm
+EMPTY_CANVAS_SIZE = (50, 25)
+
+# Color group of registration marks, added after the groups of the settings when tiling
+MARKS_SETTING = ["marks", "0", "160", "0", "0.1"]
+
+# Distance in cm up to which a curve continues the subpath of the previous one,
+# absolute so separate hatch lines far from the origin are not joined
+PATH_TOLERANCE = 1e-6
+
+# Number of curves the preflight converts to estimate file sizes
+SIZE_SAMPLE_CURVES = 2000
+
+
+def parseSettings(settingText):
+    """Parses the color settings
+
+    Args:
+        settingText: (str) One color group per line: name, r, g, b, stroke-width[, hatch-spacing, hatch-angle, feed-rate]
+
+    Returns:
+        str[][]: Columns of each color group
+    """
+
+    return [i.split(",") for i in settingText.split("\n")]
+
+
+def getHatchSettings(setting):
+    """Reads the optional hatch columns of a color setting
+
+    Args:
+        setting: (str[]) One row of the color settings
+
+    Returns:
+        (float, float): Hatch spacing in cm and angle in degrees, None if the group is not hatched
+    """
+
+    try:
+        spacing = float(setting[5]) / 10
+        angle = float(setting[6]) if len(setting) > 6 else 0
+    except (IndexError, ValueError):
+        return None
+
+    if(spacing <= 0):
+        return None
+
+    return spacing, angle
+
+
+def convertEntities(entities, settings, scale=1, hatch=True):
+    """Converts entities into SVG path data
+
+    Args:
+        entities: (dict[]) Entities to convert
+        settings: (str[][]) Color settings
+        scale: (float) How many units are per SVG unit
+        hatch: (bool) Hatches the entities of groups with hatch settings
+
+    Returns:
+        (int, str, str[], float[])[]: Color group index, name, paths and bounds of each entity
+    """
+
+    rtn = []
+
+    for e in entities:
+        # Entities of groups missing from the settings are not exported
+        if(e["group"] >= len(settings)):
+            continue
+
+        hatchLoop = getHatchLoop(e, getHatchSettings(settings[e["group"]])) if hatch else None
+
+        # Accumulated while converting, so the path data is only walked once
+        bounds = newBounds()
+        paths = entityToSVGPaths(e, scale, bounds, hatchLoop)
+        rtn.append((e["group"], e["name"], paths, bounds))
+
+    return rtn
+
+
+def entityToSVGPaths(entity, scale=1, bounds=None, hatchLoop=None):
+    """Converts an entity into SVG path data
+
+    Args:
+        entity: (dict) Entity to convert
+        scale: (float) How many units are per SVG unit
+        bounds: (float[]) Bounds to expand by the converted geometry
+        hatchLoop: (dict) Hatch lines of the entity, see getHatchLoop
+
+    Returns:
+        str[]: Array of SVG paths
+    """
+
+    rtn = ["".join(loopToSVGPath(l, scale, bounds) for l in p) for p in getPathLoops(entity)]
+
+    if(hatchLoop):
+        rtn.append(loopToSVGPath(hatchLoop, scale))
+
+    return rtn
+
+
+def getPathLoops(entity):
+    """Groups the loops of an entity into the SVG paths they are written to
+
+    Args:
+        entity: (dict) The entity
+
+    Returns:
+        dict[][]: Loops of each path
+    """
+
+    if(entity["closed"]):
+        return [entity["loops"]]
+
+    return [[l] for l in entity["loops"]]
+
+
+def getHatchLoop(entity, hatch, tol=0.001):
+    """Hatches the closed loops of an entity
+
+    Args:
+        entity: (dict) The entity
+        hatch: ((float, float)) Hatch spacing in cm and angle in degrees, see getHatchSettings
+        tol: (float) Tolerance for flattening curves in cm
+
+    Returns:
+        dict: Loop of the hatch lines, None if the entity is not hatched
+    """
+
+    # Only areas are filled, open sketch curves are not
+    loops = getClosedLoops(entity)
+
+    if(not hatch or not loops):
+        return None
+
+    return hatchLoopsToLoop(loops, hatch[0], hatch[1], tol)
+
+
+def getClosedLoops(entity):
+    """Gets the loops of an entity enclosing an area, see isLoopClosed
+
+    Args:
+        entity: (dict) The entity
+
+    Returns:
+        dict[]: Closed loops
+    """
+
+    return [l for l in entity["loops"] if isLoopClosed(l["curves"], entity["closed"])]
+
+
+def loopToSVGPath(loop, scale=1, bounds=None):
+    """Converts a loop into SVG Path data
+
+    Args:
+        loop: (dict) Loop to convert
+        scale: (float) How many units are per SVG unit
+        bounds: (float[]) Bounds to expand by the converted geometry
+
+    Returns:
+        str: SVG Path data
+    """
+
+    return "".join(recordToPathSegment(c, scale, f, m, bounds) for c, f, m in iterateLoop(loop))
+
+
+def iterateLoop(loop):
+    """Iterates over the curves of a loop in the order they are emitted
+
+    Args:
+        loop: (dict) The loop
+
+    Yields:
+        (tuple, bool, bool): Curve record, whether it is inverted and whether its path segment starts with a move
+    """
+
+    end = None
+
+    for c, f in loop["curves"]:
+        sp, ep = getRecordEndPoints(c)
+        if(f):
+            sp, ep = ep, sp
+
+        # Moves to curves not connected to the previous one, such as clipped pieces and hatch lines
+        yield c, f, end is None or abs(sp[0] - end[0]) > PATH_TOLERANCE or abs(sp[1] - end[1]) > PATH_TOLERANCE
+        end = ep
+
+
+def orderEntities(entities, ordering=ORDER_SELECTION):
+    """Orders entities and their loops for cutting
+
+    Args:
+        entities: (dict[]) Entities to order
+        ordering: (str) One of ORDERINGS
+
+    Returns:
+        dict[]: Ordered entities
+    """
+
+    if(ordering == ORDER_INNER_FIRST):
+        # Holes are cut before the outline, so parts don't move before they are done
+        return [dict(e, loops=sorted(e["loops"], key=lambda l: l["isOuter"])) for e in entities]
+
+    elif(ordering == ORDER_AREA):
+        # Small parts are cut first, before the sheet around them loses stiffness
+        return sorted(entities, key=getEntityArea)
+
+    return list(entities)
+
+
+def recordToPathSegment(record, scale=1, invert=False, moveTo=False, bounds=None):
+    """Converts a curve record into a SVG Path date segment
+
+    Args:
+        record: (tuple) The curve record to be converted
+        scale: (float) How many units are per SVG unit
+        invert: (bool) Swaps curve's startPoint and endPoint
+        moveTo: (bool) Moves to the startPoint before conversion
+        bounds: (float[]) Bounds to expand by the converted geometry
+
+    Returns:
+        str: Segment of SVG Path data.
+
+    """
+
+    rtn = ""
+
+    if(record[0] == "line"):
+        _, sx, sy, ex, ey = record
+
+        if(invert):
+            sx, sy, ex, ey = ex, ey, sx, sy
+
+        if(moveTo):
+            rtn += "M{0:.6f} {1:.6f} ".format(
+                sx / scale,
+                -sy / scale
+            )
+
+        rtn += "L{0:.6f} {1:.6f} ".format(
+            ex / scale,
+            -ey / scale)
+
+    elif(record[0] == "arc"):
+        _, cx, cy, r, sx, sy, ex, ey, sweep = record
+
+        # SVG's y axis points down, so counterclockwise has sweep flag 0
+        sweepFlag = sweep < 0
+
+        if(invert):
+            sx, sy, ex, ey = ex, ey, sx, sy
+            sweepFlag = not sweepFlag
+
+        if(moveTo):
+            rtn += "M{0:.6f} {1:.6f} ".format(
+                sx / scale,
+                -sy / scale
+            )
+
+        # rx ry rot large_af sweep_af x y
+        rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
+            r / scale,
+            abs(sweep) > math.pi,
+            sweepFlag,
+            ex / scale,
+            -ey / scale
+        )
+
+    elif(record[0] == "circle"):
+        _, cx, cy, r = record
+
+        sp = (cx + r, cy)
+        ep = (cx, cy + r)
+
+        if(moveTo):
+            rtn += "M{0:.6f} {1:.6f} ".format(
+                sp[0] / scale,
+                -sp[1] / scale
+            )
+
+        rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
+            r / scale,
+            not invert,
+            not invert,
+            ep[0] / scale,
+            -ep[1] / scale
+        )
+
+        rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
+            r / scale,
+            invert,
+            not invert,
+            sp[0] / scale,
+            -sp[1] / scale
+        )
+
+    elif(record[0] == "ellipse"):
+        _, cx, cy, a, b, ux, uy = record
+
+        sp = (cx + ux * a, cy + uy * a)
+        ep = (cx + uy * b, cy - ux * b)
+
+        angle = -math.degrees(math.atan2(uy, ux))
+
+        if(moveTo):
+            rtn += "M{0:.6f} {1:.6f} ".format(
+                sp[0] / scale,
+                -sp[1] / scale
+            )
+
+        # rx ry rot large_af sweep_af x y
+        rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
+            a / scale,
+            b / scale,
+            angle,
+            not invert,
+            invert,
+            ep[0] / scale,
+            -ep[1] / scale
+        )
+
+        rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
+            a / scale,
+            b / scale,
+            angle,
+            invert,
+            invert,
+            sp[0] / scale,
+            -sp[1] / scale
+        )
+
+    elif(record[0] == "ellarc"):
+        _, cx, cy, a, b, ux, uy, sx, sy, ex, ey, sweep = record
+
+        angle = -math.degrees(math.atan2(uy, ux))
+        sweepFlag = sweep < 0
+
+        if(invert):
+            sx, sy, ex, ey = ex, ey, sx, sy
+            sweepFlag = not sweepFlag
+
+        if(moveTo):
+            rtn += "M{0:.6f} {1:.6f} ".format(
+                sx / scale,
+                -sy / scale
+            )
+
+        # rx ry rot large_af sweep_af x y
+        rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
+            a / scale,
+            b / scale,
+            angle,
+            abs(sweep) > math.pi,
+            sweepFlag,
+            ex / scale,
+            -ey / scale
+        )
+
+    elif(record[0] == "nurbs"):
+        p = list(zip(record[1::2], record[2::2]))
+
+        if(invert):
+            p.reverse()
+
+        if(moveTo):
+            rtn += "M{0:.6f} {1:.6f} ".format(
+                p[0][0] / scale,
+                -p[0][1] / scale
+            )
+        for i in p[1:]:
+            rtn += "L{0:.6f} {1:.6f} ".format(
+                i[0] / scale,
+                -i[1] / scale
+            )
+
+    else:
+        print("Warning: Unsupported curve record, could not be converted: {}".format(record[0]))
+
+    if(bounds is not None):
+        expandBoundsByRecord(bounds, record, scale)
+
+    return rtn
+
+
+def getRecordEndPoints(record):
+    """Gets the start and end point of a curve record
+
+    Args:
+        record: (tuple) The curve record
+
+    Returns:
+        ((float, float), (float, float)): Start and end point
+    """
+
+    if(record[0] == "line"):
+        return record[1:3], record[3:5]
+
+    elif(record[0] == "arc"):
+        return record[4:6], record[6:8]
+
+    elif(record[0] == "circle"):
+        sp = (record[1] + record[3], record[2])
+        return sp, sp
+
+    elif(record[0] == "ellipse"):
+        _, cx, cy, a, b, ux, uy = record
+        sp = (cx + ux * a, cy + uy * a)
+        return sp, sp
+
+    elif(record[0] == "ellarc"):
+        return record[7:9], record[9:11]
+
+    elif(record[0] == "nurbs"):
+        return record[1:3], record[-2:]
+
+
+def orientLoop(records, isOuter=True, tol=1e-4):
+    """Lines up curve records end to end and orients the loop they form
+
+    Flips and the signed area are found in a single pass over the end points.
+    Outer loops are oriented clockwise, inner loops counterclockwise.
+
+    Args:
+        records: (tuple[]) Curve records in the order they form the loop
+        isOuter: (bool) Whether the loop is the outline or a hole
+        tol: (float) Tolerance for matching end points in cm
+
+    Returns:
+        dict: Loop with its signed area, see loopSignedArea
+    """
+
+    curves = []
+    area = 0
+    end = None
+
+    for i, r in enumerate(records):
+        sp, ep = getRecordEndPoints(r)
+
+        if(i == 0):
+            # The first curve is backwards if its start point connects to the next curve
+            flip = len(records) > 1 and any(isPointClose(sp, p, tol) for p in getRecordEndPoints(records[1]))
+        else:
+            flip = not isPointClose(sp, end, tol)
+
+        end = sp if flip else ep
+        area += -recordArea(r) if flip else recordArea(r)
+        curves.append((r, flip))
+
+    # Clockwise loops have a negative area
+    if(isOuter != (area < 0)):
+        curves = [(r, not f) for r, f in reversed(curves)]
+        area = -area
+
+    return {"isOuter": isOuter, "area": area, "curves": curves}
+
+
+def loopSignedArea(curves):
+    """Calculates the exact signed area enclosed by a loop
+
+    Args:
+        curves: ((tuple, bool)[]) Curve records and whether they are inverted, lined up end to end
+
+    Returns:
+        float: Area in cm², positive if counterclockwise
+    """
+
+    return sum(-recordArea(r) if f else recordArea(r) for r, f in curves)
+
+
+def recordArea(record):
+    """Calculates the signed area term of a curve record, the integral of (x dy - y dx) / 2 along it
+
+    Summed over a closed loop this gives the enclosed area. For arcs it is the
+    chord term plus the exact circular or elliptical segment between chord and arc.
+
+    Args:
+        record: (tuple) The curve record, traversed from start to end point
+
+    Returns:
+        float: Area term in cm²
+    """
+
+    if(record[0] == "nurbs"):
+        return sum(
+            (x0 * y1 - x1 * y0) / 2
+            for x0, y0, x1, y1 in zip(record[1:-2:2], record[2:-2:2], record[3::2], record[4::2])
+        )
+
+    # Closed curves, drawn clockwise for circles and counterclockwise for ellipses
+    elif(record[0] == "circle"):
+        return -math.pi * record[3]**2
+
+    elif(record[0] == "ellipse"):
+        return math.pi * record[3] * record[4]
+
+    (sx, sy), (ex, ey) = getRecordEndPoints(record)
+    rtn = (sx * ey - ex * sy) / 2
+
+    if(record[0] == "arc"):
+        r, sweep = record[3], record[8]
+        rtn += r**2 / 2 * (sweep - math.sin(sweep))
+
+    elif(record[0] == "ellarc"):
+        a, b, sweep = record[3], record[4], record[11]
+        rtn += a * b / 2 * (sweep - math.sin(sweep))
+
+    return rtn
+
+
+def isLoopClosed(curves, closed=False):
+    """Determines if a loop encloses an area
+
+    Loops of closed entities always do, loops of open entities only if they are a single closed curve.
+
+    Args:
+        curves: ((tuple, bool)[]) Curve records of the loop and whether they are inverted
+        closed: (bool) Whether the loop belongs to a closed entity
+
+    Returns:
+        bool: True if the loop encloses an area
+    """
+
+    return closed or (len(curves) == 1 and curves[0][0][0] in CLOSED_CURVE_TYPES)
+
+
+def isPointClose(a, b, tol=1e-4):
+    """Determins if two points are almost-equal
+
+    Args:
+        a: ((float, float)) The Point to be checked
+        b: ((float, float)) The Point to check agains
+        tol: (float) Tollerance for almost-equality
+
+    Returns:
+        bool: True if almost equal
+    """
+
+    return math.isclose(a[0], b[0], rel_tol=tol, abs_tol=tol) and math.isclose(a[1], b[1], rel_tol=tol, abs_tol=tol)
+
+
+def getEntityArea(entity):
+    """Gets the area of an entity, holes excluded
+
+    Args:
+        entity: (dict) The entity
+
+    Returns:
+        float: Area in cm²
+    """
+
+    return abs(sum(l["area"] for l in entity["loops"]))
+
+
+def getEllipticalArcParameters(record):
+    """Gets the parametric form c + u*cos(t) + v*sin(t) of an arc record
+
+    Args:
+        record: (tuple) An arc, circle, ellipse or ellarc record
+
+    Returns:
+        ((float, float), (float, float), (float, float), float, float): c, u, v and the parameter range t0 to t1, t0 <= t1
+    """
+
+    if(record[0] == "arc"):
+        _, cx, cy, r, sx, sy, ex, ey, sweep = record
+
+        # Parameterised from the start point, v points in the direction of travel
+        u = (sx - cx, sy - cy)
+        v = (-u[1], u[0]) if sweep > 0 else (u[1], -u[0])
+        return (cx, cy), u, v, 0, abs(sweep)
+
+    # Closed curves run in the direction recordToPathSegment draws them, clockwise for circles
+    elif(record[0] == "circle"):
+        _, cx, cy, r = record
+        return (cx, cy), (r, 0), (0, -r), 0, 2*math.pi
+
+    elif(record[0] == "ellipse"):
+        _, cx, cy, a, b, ux, uy = record
+        return (cx, cy), (ux * a, uy * a), (-uy * b, ux * b), 0, 2*math.pi
+
+    elif(record[0] == "ellarc"):
+        _, cx, cy, a, b, ux, uy, sx, sy, ex, ey, sweep = record
+
+        # Minor axis points in the direction of travel
+        vx, vy = (-uy, ux) if sweep > 0 else (uy, -ux)
+        t0 = math.atan2(((sx - cx) * vx + (sy - cy) * vy) / b, ((sx - cx) * ux + (sy - cy) * uy) / a)
+        return (cx, cy), (ux * a, uy * a), (vx * b, vy * b), t0, t0 + abs(sweep)
+
+
+def recordToPoints(record, tol=0.001):
+    """Approximates a curve record by a polyline
+
+    Args:
+        record: (tuple) The curve record
+        tol: (float) Maximum distance between curve and polyline in cm
+
+    Returns:
+        (float, float)[]: Points from start to end point
+    """
+
+    if(record[0] == "line"):
+        return [record[1:3], record[3:5]]
+
+    elif(record[0] == "nurbs"):
+        return list(zip(record[1::2], record[2::2]))
+
+    c, u, v, t0, t1 = getEllipticalArcParameters(record)
+
+    # Segment count keeping the sagitta of the larger radius below tol
+    r = max(math.hypot(*u), math.hypot(*v))
+    step = 2 * math.acos(max(-1, 1 - tol / r)) if r > tol else math.pi / 2
+    n = max(1, math.ceil((t1 - t0) / step))
+
+    rtn = []
+    for i in range(n + 1):
+        t = lerp(t0, t1, i / n)
+        rtn.append((
+            c[0] + u[0] * math.cos(t) + v[0] * math.sin(t),
+            c[1] + u[1] * math.cos(t) + v[1] * math.sin(t)
+        ))
+
+    return rtn
+
+
+def newBounds():
+    """Creates empty bounds to be expanded during conversion
+
+    Returns:
+        float[]: min x, min y, max x, max y
+    """
+
+    return [math.inf, math.inf, -math.inf, -math.inf]
+
+
+def unionBounds(boundsList):
+    """Combines several bounds into one enclosing all of them
+
+    Args:
+        boundsList: (float[][]) Bounds to combine
+
+    Returns:
+        float[]: min x, min y, max x, max y
+    """
+
+    rtn = newBounds()
+
+    for b in boundsList:
+        rtn = [min(rtn[0], b[0]), min(rtn[1], b[1]), max(rtn[2], b[2]), max(rtn[3], b[3])]
+
+    return rtn
+
+
+def expandBounds(bounds, x, y):
+    """Expands bounds to include a point
+
+    Args:
+        bounds: (float[]) min x, min y, max x, max y
+        x: (float) X coordinate of the point
+        y: (float) Y coordinate of the point
+    """
+
+    bounds[0] = min(bounds[0], x)
+    bounds[1] = min(bounds[1], y)
+    bounds[2] = max(bounds[2], x)
+    bounds[3] = max(bounds[3], y)
+
+
+def expandBoundsByEllipse(bounds, c, u, v, t0=0, t1=2*math.pi):
+    """Expands bounds to include an elliptical arc c + u*cos(t) + v*sin(t)
+
+    Uses the analytic extrema of the arc instead of sampling it.
+
+    Args:
+        bounds: (float[]) min x, min y, max x, max y
+        c: ((float, float)) Center
+        u: ((float, float)) Semi axis at t = 0
+        v: ((float, float)) Semi axis at t = pi/2
+        t0: (float) Start parameter
+        t1: (float) End parameter, greater than t0
+    """
+
+    # x and y each have two extrema half a turn apart
+    candidates = [t0, t1]
+    for e in (math.atan2(v[0], u[0]), math.atan2(v[1], u[1])):
+        for t in (e, e + math.pi):
+            t = t0 + (t - t0) % (2*math.pi)
+            if(t <= t1):
+                candidates.append(t)
+
+    for t in candidates:
+        expandBounds(
+            bounds,
+            c[0] + u[0] * math.cos(t) + v[0] * math.sin(t),
+            c[1] + u[1] * math.cos(t) + v[1] * math.sin(t)
+        )
+
+
+def getRecordBounds(record):
+    """Gets the bounds of a curve record in Fusion coordinates
+
+    Args:
+        record: (tuple) The curve record
+
+    Returns:
+        float[]: min x, min y, max x, max y
+    """
+
+    bounds = newBounds()
+    expandBoundsByRecord(bounds, record)
+
+    # SVG coordinates have y flipped
+    return [bounds[0], -bounds[3], bounds[2], -bounds[1]]
+
+
+def expandBoundsByRecord(bounds, record, scale=1):
+    """Expands bounds to include a curve record in SVG coordinates
+
+    Args:
+        bounds: (float[]) min x, min y, max x, max y
+        record: (tuple) The curve record
+        scale: (float) How many units are per SVG unit
+    """
+
+    if(record[0] in ["line", "nurbs"]):
+        for x, y in zip(record[1::2], record[2::2]):
+            expandBounds(bounds, x / scale, -y / scale)
+
+    elif(record[0] in ["arc", "circle", "ellipse", "ellarc"]):
+        c, u, v, t0, t1 = getEllipticalArcParameters(record)
+
+        # Mapped into SVG coordinates, the parameters stay the same
+        expandBoundsByEllipse(
+            bounds,
+            (c[0] / scale, -c[1] / scale),
+            (u[0] / scale, -u[1] / scale),
+            (v[0] / scale, -v[1] / scale),
+            t0,
+            t1
+        )
+
+
+def hatchLoopsToLoop(loops, spacing, angle=0, tol=0.001):
+    """Fills the area enclosed by loops with parallel scan lines
+
+    Args:
+        loops: (dict[]) Loops bounding the area, holes included
+        spacing: (float) Distance between two scan lines in cm
+        angle: (float) Angle of the scan lines in degrees
+        tol: (float) Tolerance for flattening curves in cm
+
+    Returns:
+        dict: Loop of the hatch lines as line records, not connected end to end
+    """
+
+    edges = []
+
+    for l in loops:
+        for c, _ in l["curves"]:
+            points = recordToPoints(c, tol)
+            edges += zip(points[:-1], points[1:])
+
+    curves = [(("line",) + s + e, False) for s, e in hatchPolygons(edges, spacing, angle)]
+
+    return {"isOuter": False, "area": 0, "curves": curves}
+
+
+def hatchPolygons(edges, spacing, angle=0):
+    """Fills polygons with parallel scan lines using the even-odd rule
+
+    Uses a sorted edge table and an active edge list, so every scan line
+    only intersects the edges actually crossing it. Lines are ordered
+    alternating left to right and right to left to minimise travel.
+
+    Args:
+        edges: (((float, float), (float, float))[]) Polygon edges in any order
+        spacing: (float) Distance between two scan lines
+        angle: (float) Angle of the scan lines in degrees
+
+    Returns:
+        ((float, float), (float, float))[]: Start and end point of each hatch line
+    """
+
+    cos = math.cos(math.radians(angle))
+    sin = math.sin(math.radians(angle))
+
+    # Rotates the edges so the scan lines become horizontal
+    # Each entry is (y min, y max, x at y min, dx/dy)
+    edgeTable = []
+    for (x0, y0), (x1, y1) in edges:
+        rx0, ry0 = x0 * cos + y0 * sin, y0 * cos - x0 * sin
+        rx1, ry1 = x1 * cos + y1 * sin, y1 * cos - x1 * sin
+
+        # Horizontal edges never cross a scan line
+        if(ry0 == ry1):
+            continue
+
+        if(ry0 > ry1):
+            rx0, ry0, rx1, ry1 = rx1, ry1, rx0, ry0
+
+        edgeTable.append((ry0, ry1, rx0, (rx1 - rx0) / (ry1 - ry0)))
+
+    if(not edgeTable):
+        return []
+
+    edgeTable.sort(key=lambda e: e[0])
+    yMax = max(e[1] for e in edgeTable)
+
+    rtn = []
+    active = []
+    n = 0
+    leftToRight = True
+
+    # Scan lines lie on a global grid so hatches of neighbouring parts line up
+    # Offset by half a spacing, so they don't retrace edges on whole multiples of it
+    k = math.ceil(edgeTable[0][0] / spacing - 0.5)
+    y = (k + 0.5) * spacing
+
+    while(y < yMax):
+        # Edges cover [y min, y max) so vertices are only counted once
+        while(n < len(edgeTable) and edgeTable[n][0] <= y):
+            active.append(edgeTable[n])
+            n += 1
+        active = [e for e in active if e[1] > y]
+
+        xs = sorted(e[2] + (y - e[0]) * e[3] for e in active)
+        spans = [(xs[i], xs[i+1]) for i in range(0, len(xs) - 1, 2) if xs[i] < xs[i+1]]
+
+        if(not leftToRight):
+            spans = [(b, a) for a, b in reversed(spans)]
+
+        for a, b in spans:
+            rtn.append((
+                (a * cos - y * sin, a * sin + y * cos),
+                (b * cos - y * sin, b * sin + y * cos)
+            ))
+
+        if(spans):
+            leftToRight = not leftToRight
+
+        k += 1
+        y = (k + 0.5) * spacing
+
+    return rtn
+
+
+def tileEntities(entities, settings, width, height, overlap=0, marks=False, markSize=0.5):
+    """Splits entities into tiles of a fixed size
+
+    Curves are clipped exactly at the tile borders. A uniform grid index maps
+    the bounds of each curve, or each segment of a NURBS, to the tiles it
+    overlaps, so they are only clipped against those. Hatch lines are
+    generated before clipping.
+
+    Args:
+        entities: (dict[]) Extracted entities
+        settings: (str[][]) Color settings
+        width: (float) Width of a tile in cm
+        height: (float) Height of a tile in cm
+        overlap: (float) Distance neighbouring tiles overlap in cm
+        marks: (bool) Adds registration crosses, in a color group of their own after the last one of settings,
+            centered in the overlaps where they cross no material, see MARKS_SETTING
+        markSize: (float) Arm length of the registration crosses in cm
+
+    Returns:
+        (int, int, float[], dict[])[]: Row, column, rectangle (min x, min y, max x, max y) and entities of each non empty tile
+    """
+
+    stepX = width - overlap
+    stepY = height - overlap
+
+    if(stepX <= 0 or stepY <= 0):
+        raise ValueError("Tile overlap must be smaller than the tile size")
+
+    entities = [e for e in entities if e["group"] < len(settings)]
+
+    bounds = unionBounds([getRecordBounds(c) for e in entities for l in e["loops"] for c, _ in l["curves"]])
+    if(bounds[0] > bounds[2]):
+        return []
+
+    columns = max(1, math.ceil((bounds[2] - bounds[0] - overlap) / stepX))
+    rows = max(1, math.ceil((bounds[3] - bounds[1] - overlap) / stepY))
+
+    # Registration crosses on the grid of tile corners, so neighbouring tiles share them
+    if(marks):
+        origin = (bounds[0] + overlap / 2, bounds[1] + overlap / 2)
+        crosses = []
+        for x, y in getFreeMarkPositions(entities, origin, stepX, stepY, columns + 1, rows + 1, markSize):
+            crosses.append({"isOuter": True, "area": 0, "curves": [(("line", x - markSize, y, x + markSize, y), False)]})
+            crosses.append({"isOuter": True, "area": 0, "curves": [(("line", x, y - markSize, x, y + markSize), False)]})
+
+    entities = [addHatchLoop(e, settings) for e in entities]
+
+    if(marks and crosses):
+        entities.append({"group": len(settings), "name": "marks", "closed": True, "loops": crosses})
+
+    # Tile index range covering [a, b], tile k spans origin + k * step to origin + k * step + size
+    def tileRange(a, b, origin, step, size, count):
+        first = max(0, math.ceil((a - origin - size) / step))
+        last = min(count - 1, math.floor((b - origin) / step))
+        return range(first, last + 1)
+
+    def tileRect(column, row):
+        x = bounds[0] + column * stepX
+        y = bounds[1] + row * stepY
+        return [x, y, x + width, y + height]
+
+    # Clipped pieces of a curve record per (row, column), from its start to its end
+    def clipToTiles(record):
+        # Segments of NURBS are indexed one by one, as a long spline spans many tiles
+        if(record[0] == "nurbs"):
+            parts = [("nurbs",) + segment for segment in zip(record[1:-2:2], record[2:-2:2], record[3::2], record[4::2])]
+        else:
+            parts = [record]
+
+        rtn = {}
+
+        for part in parts:
+            b = getRecordBounds(part)
+
+            for row in tileRange(b[1], b[3], bounds[1], stepY, height, rows):
+                for column in tileRange(b[0], b[2], bounds[0], stepX, width, columns):
+                    pieces = rtn.setdefault((row, column), [])
+
+                    for p in clipRecord(part, tileRect(column, row)):
+                        # Continues the polyline while segments stay inside
+                        if(p[0] == "nurbs" and pieces and pieces[-1][0] == "nurbs" and pieces[-1][-2:] == p[1:3]):
+                            pieces[-1] += p[3:]
+                        else:
+                            pieces.append(p)
+
+        return rtn
+
+    # (row, column) -> entity index -> loop index -> clipped curves
+    tiles = {}
+
+    for n, e in enumerate(entities):
+        for m, l in enumerate(e["loops"]):
+            for c, f in l["curves"]:
+                for key, pieces in clipToTiles(c).items():
+                    if(f):
+                        pieces.reverse()
+
+                    if(pieces):
+                        tiles.setdefault(key, {}).setdefault(n, {}).setdefault(m, []).extend((p, f) for p in pieces)
+
+    rtn = []
+
+    for (row, column), tile in sorted(tiles.items()):
+        content = []
+
+        for n, loops in sorted(tile.items()):
+            e = entities[n]
+            content.append(dict(e, loops=[
+                {"isOuter": e["loops"][m]["isOuter"], "area": 0, "curves": curves}
+                for m, curves in sorted(loops.items())
+            ]))
+
+        rtn.append((row, column, tileRect(column, row), content))
+
+    return rtn
+
+
+def getFreeMarkPositions(entities, origin, stepX, stepY, columns, rows, markSize, tol=0.001):
+    """Finds the positions of a grid where a registration cross would cross no material
+
+    Edges are mapped to the crosses their bounds overlap, like the tile index of tileEntities.
+    Crosses inside closed loops are found by the even-odd rule along their row.
+
+    Args:
+        entities: (dict[]) Extracted entities
+        origin: ((float, float)) Position of the first cross
+        stepX: (float) Horizontal distance of the crosses
+        stepY: (float) Vertical distance of the crosses
+        columns: (int) Number of crosses per row
+        rows: (int) Number of rows
+        markSize: (float) Arm length of the crosses
+        tol: (float) Tolerance for flattening curves in cm
+
+    Returns:
+        (float, float)[]: Centers of the crosses clear of material
+    """
+
+    def position(column, row):
+        return origin[0] + column * stepX, origin[1] + row * stepY
+
+    def gridRange(a, b, start, step, count):
+        return range(max(0, math.ceil((a - start) / step)), min(count - 1, math.floor((b - start) / step)) + 1)
+
+    blocked = set()
+
+    # x of the closed edges crossing each row
+    crossings = [[] for _ in range(rows)]
+
+    for e in entities:
+        for l in e["loops"]:
+            closed = isLoopClosed(l["curves"], e["closed"])
+
+            for c, _ in l["curves"]:
+                points = recordToPoints(c, tol)
+
+                for (x0, y0), (x1, y1) in zip(points[:-1], points[1:]):
+                    for row in gridRange(min(y0, y1) - markSize, max(y0, y1) + markSize, origin[1], stepY, rows):
+                        for column in gridRange(min(x0, x1) - markSize, max(x0, x1) + markSize, origin[0], stepX, columns):
+                            if((column, row) not in blocked):
+                                x, y = position(column, row)
+                                if(clipLine((x0, y0), (x1, y1), [x - markSize, y - markSize, x + markSize, y + markSize])):
+                                    blocked.add((column, row))
+
+                    if(closed and y0 != y1):
+                        # Edges cover [y min, y max), so vertices are only counted once
+                        for row in gridRange(min(y0, y1), max(y0, y1), origin[1], stepY, rows):
+                            y = position(0, row)[1]
+                            if(y < max(y0, y1)):
+                                crossings[row].append(x0 + (y - y0) * (x1 - x0) / (y1 - y0))
+
+    rtn = []
+
+    for row in range(rows):
+        for column in range(columns):
+            x, y = position(column, row)
+
+            # Inside material if an odd number of edges cross the row to the right
+            if((column, row) not in blocked and sum(xc > x for xc in crossings[row]) % 2 == 0):
+                rtn.append((x, y))
+
+    return rtn
+
+
+def addHatchLoop(entity, settings, tol=0.001):
+    """Adds the hatch lines of an entity's color group as a loop of line records
+
+    Args:
+        entity: (dict) Extracted entity
+        settings: (str[][]) Color settings
+        tol: (float) Tolerance for flattening curves in cm
+
+    Returns:
+        dict: Entity including its hatch lines
+    """
+
+    hatchLoop = getHatchLoop(entity, getHatchSettings(settings[entity["group"]]), tol)
+
+    if(not hatchLoop):
+        return entity
+
+    return dict(entity, loops=entity["loops"] + [hatchLoop])
+
+
+def writeTiles(folder, tiles, settings, scale=1, template="{document}_{name}", compress=False, workers=4, **fields):
+    """Writes one file per tile, several files at once
+
+    Args:
+        folder: (str) Folder to write the files to
+        tiles: ((int, int, float[], dict[])[]) Tiles, see tileEntities
+        settings: (str[][]) Color settings
+        scale: (float) How many units are per SVG unit
+        template: (str) Filename template, may use {name}, {row}, {column}, {index} and any of fields
+        compress: (bool) Writes gzip compressed svgz files
+        workers: (int) Number of files written at the same time
+        fields: Further values of the template placeholders
+
+    Returns:
+        str[]: Paths of the written files
+    """
+
+    checkTemplate(template, TILE_TEMPLATE_FIELDS + list(fields))
+
+    extension = ".svgz" if compress else ".svg"
+
+    # Registration marks are in a color group after the last one
+    settings = settings + [MARKS_SETTING]
+
+    # Named up front, so tiles sharing a name are told apart before writing in parallel
+    names = uniqueFilenames([
+        formatFilename(template, name="tile_{}_{}".format(row, column), group="tile_{}_{}".format(row, column), row=row, column=column, index=i, **fields)
+        for i, (row, column, _, _) in enumerate(tiles)
+    ])
+
+    def writeTile(name, tile):
+        row, column, rect, entities = tile
+
+        # Hatch lines are already part of the tiles
+        converted = convertEntities(entities, settings, scale, False)
+
+        # The viewBox covers the whole tile, with the tile's corner at the origin
+        bounds = [rect[0] / scale, -rect[3] / scale, rect[2] / scale, -rect[1] / scale]
+
+        filename = os.path.join(folder, name + extension)
+        writeSVGFile(filename, converted, settings, 0, True, compress, bounds)
+
+        return filename
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(writeTile, names, tiles))
+
+
+def clipRecord(record, rect, tol=1e-9):
+    """Clips a curve record exactly to a rectangle
+
+    Args:
+        record: (tuple) The curve record
+        rect: (float[]) min x, min y, max x, max y
+        tol: (float) Tolerance for points on the border in cm
+
+    Returns:
+        tuple[]: Pieces inside the rectangle from start to end, lines and arcs keep their type
+    """
+
+    def isInside(x, y):
+        return rect[0] - tol <= x <= rect[2] + tol and rect[1] - tol <= y <= rect[3] + tol
+
+    if(record[0] == "line"):
+        piece = clipLine(record[1:3], record[3:5], rect)
+        return [("line",) + piece[0] + piece[1]] if piece else []
+
+    elif(record[0] == "nurbs"):
+        rtn = []
+
+        for s, e in zip(zip(record[1::2], record[2::2]), zip(record[3::2], record[4::2])):
+            piece = clipLine(s, e, rect)
+            if(not piece):
+                continue
+
+            # Continues the polyline while segments stay inside
+            if(rtn and rtn[-1][-2:] == piece[0]):
+                rtn[-1] += piece[1]
+            else:
+                rtn.append(("nurbs",) + piece[0] + piece[1])
+
+        return rtn
+
+    c, u, v, t0, t1 = getEllipticalArcParameters(record)
+
+    def point(t):
+        return (c[0] + u[0] * math.cos(t) + v[0] * math.sin(t), c[1] + u[1] * math.cos(t) + v[1] * math.sin(t))
+
+    # Parameters where the curve crosses a border line, solving A cos(t) + B sin(t) = C
+    ts = [t0, t1]
+    for A, B, C in ((u[0], v[0], rect[0] - c[0]), (u[0], v[0], rect[2] - c[0]), (u[1], v[1], rect[1] - c[1]), (u[1], v[1], rect[3] - c[1])):
+        R = math.hypot(A, B)
+        if(R == 0 or abs(C) > R):
+            continue
+
+        phi = math.atan2(B, A)
+        d = math.acos(C / R)
+        for t in (phi + d, phi - d):
+            t = t0 + (t - t0) % (2*math.pi)
+            if(t0 < t < t1):
+                ts.append(t)
+
+    ts.sort()
+
+    if(len(ts) == 2):
+        return [record] if isInside(*point((t0 + t1) / 2)) else []
+
+    a = math.hypot(*u)
+    b = math.hypot(*v)
+    direction = 1 if u[0] * v[1] - u[1] * v[0] > 0 else -1
+
+    rtn = []
+    for ta, tb in zip(ts[:-1], ts[1:]):
+        if(tb - ta <= tol or not isInside(*point((ta + tb) / 2))):
+            continue
+
+        sp = point(ta)
+        ep = point(tb)
+
+        if(math.isclose(a, b)):
+            rtn.append(("arc", c[0], c[1], a) + sp + ep + (direction * (tb - ta),))
+        else:
+            rtn.append(("ellarc", c[0], c[1], a, b, u[0] / a, u[1] / a) + sp + ep + (direction * (tb - ta),))
+
+    return rtn
+
+
+def clipLine(s, e, rect):
+    """Clips a line to a rectangle using the Liang-Barsky algorithm
+
+    Args:
+        s: ((float, float)) Start point
+        e: ((float, float)) End point
+        rect: (float[]) min x, min y, max x, max y
+
+    Returns:
+        ((float, float), (float, float)): Start and end point of the clipped line, None if it is outside
+    """
+
+    dx = e[0] - s[0]
+    dy = e[1] - s[1]
+    t0, t1 = 0, 1
+
+    for p, q in ((-dx, s[0] - rect[0]), (dx, rect[2] - s[0]), (-dy, s[1] - rect[1]), (dy, rect[3] - s[1])):
+        if(p == 0):
+            if(q < 0):
+                return None
+        elif(p < 0):
+            t0 = max(t0, q / p)
+        else:
+            t1 = min(t1, q / p)
+
+    if(t0 >= t1):
+        return None
+
+    # Keeps unclipped end points exact, so polylines stay connected
+    sp = s if t0 == 0 else (s[0] + t0 * dx, s[1] + t0 * dy)
+    ep = e if t1 == 1 else (s[0] + t1 * dx, s[1] + t1 * dy)
+
+    return tuple(sp), tuple(ep)
+
+
+def collectStatistics(entities, settings, scale=1, margin=0, moveToOrigin=False, exactSize=False):
+    """Measures what an export would produce without writing it
+
+    Counts, lengths and pierces are taken from the curve records. For file sizes
+    the SVG is written with empty path data, and the path data of every n-th
+    curve, about SIZE_SAMPLE_CURVES in total, is measured and extrapolated.
+
+    Args:
+        entities: (dict[]) Extracted entities
+        settings: (str[][]) Color settings
+        scale: (float) How many units are per SVG unit
+        margin: (float) Space around the bounds in SVG units
+        moveToOrigin: (bool) Translates the geometry so the viewBox starts at 0 0
+        exactSize: (bool) Converts all entities to measure the exact file sizes
+
+    Returns:
+        dict: Statistics per color group, NURBS point counts and file sizes, see formatStatistics
+    """
+
+    groups = [
+        {"name": s[0], "entities": 0, "curves": dict.fromkeys(CURVE_TYPES, 0), "hatchLines": 0, "length": 0, "pierces": 0, "feedRate": getFeedRate(s)}
+        for s in settings
+    ]
+    nurbsPoints = []
+
+    # Entity, hatch loop and curve count of each exported entity
+    exported = []
+
+    for e in entities:
+        if(e["group"] >= len(settings)):
+            continue
+
+        group = groups[e["group"]]
+        group["entities"] += 1
+
+        # Same stages as convertEntities, keeping the hatch lines to measure them
+        hatchLoop = getHatchLoop(e, getHatchSettings(settings[e["group"]]))
+        loops = e["loops"] + [hatchLoop] if hatchLoop else e["loops"]
+
+        for l in e["loops"]:
+            for c, _ in l["curves"]:
+                group["curves"][c[0]] += 1
+                group["length"] += recordLength(c)
+
+                if(c[0] == "nurbs"):
+                    nurbsPoints.append((len(c) - 1) // 2)
+
+        if(hatchLoop):
+            group["hatchLines"] += len(hatchLoop["curves"])
+            group["length"] += sum(recordLength(c) for c, _ in hatchLoop["curves"])
+
+        exported.append((e, hatchLoop, sum(len(l["curves"]) for l in loops)))
+
+    for g in groups:
+        g["time"] = g["length"] * 10 / g["feedRate"] if g["feedRate"] else None
+
+    totalCurves = sum(n for _, _, n in exported)
+    step = 1 if exactSize else max(1, math.ceil(totalCurves / SIZE_SAMPLE_CURVES))
+
+    # Path data of every step-th curve, all of it if step is 1
+    sample = SizeEstimator()
+    sampledCurves = 0
+    index = 0
+    bounds = newBounds()
+    pathss = [[] for _ in settings]
+
+    for e, hatchLoop, _ in exported:
+        paths = []
+
+        for p in getPathLoops(e) + ([[hatchLoop]] if hatchLoop else []):
+            data = ""
+
+            for l in p:
+                for c, f, m in iterateLoop(l):
+                    # Every subpath starts with a move, so it is pierced once
+                    groups[e["group"]]["pierces"] += m
+
+                    if(index % step == 0):
+                        data += recordToPathSegment(c, scale, f, m, bounds)
+                        sampledCurves += 1
+                    index += 1
+
+            if(step == 1):
+                paths.append(data)
+            else:
+                paths.append("")
+                sample.write(data)
+
+        pathss[e["group"]].append(paths)
+
+    # Measures the output of the regular writer, plain and gzip compressed
+    stream = SizeEstimator()
+    writeSVG(stream, pathss, settings, bounds, margin, moveToOrigin, scale)
+    stream.close()
+    sample.close()
+
+    factor = totalCurves / sampledCurves if step > 1 else 0
+
+    return {
+        "groups": groups,
+        "nurbsPoints": nurbsPoints,
+        "size": stream.size + sample.size * factor,
+        "compressedSize": stream.compressedSize + sample.compressedSize * factor,
+        "sampledCurves": sampledCurves,
+        "totalCurves": totalCurves
+    }
+
+
+def formatStatistics(stats, tiled=False):
+    """Formats export statistics as a report
+
+    Args:
+        stats: (dict) Statistics, see collectStatistics
+        tiled: (bool) Notes that the export is tiled, which the statistics don't reflect
+
+    Returns:
+        str: Report, one fact per line
+    """
+
+    lines = []
+
+    for g in stats["groups"]:
+        if(not g["entities"]):
+            continue
+
+        lines.append("{}: {} entities".format(g["name"].strip(), g["entities"]))
+        lines.append("    Curves: " + ", ".join("{} {}".format(n, t) for t, n in g["curves"].items() if n))
+        if(g["hatchLines"]):
+            lines.append("    Hatch lines: {}".format(g["hatchLines"]))
+        lines.append("    Cut length: {:.1f} mm, pierces: {}".format(g["length"] * 10, g["pierces"]))
+        if(g["time"] is not None):
+            lines.append("    Cutting time: {:.0f} s at {:g} mm/s".format(g["time"], g["feedRate"]))
+        else:
+            lines.append("    Cutting time: no feed rate set")
+
+    total = [g["time"] for g in stats["groups"] if g["entities"]]
+    if(total and None not in total):
+        lines.append("Total cutting time: {:.0f} s".format(sum(total)))
+
+    if(stats["nurbsPoints"]):
+        points = stats["nurbsPoints"]
+        lines.append("NURBS: {} curves flattened into {} points, at most {}".format(len(points), sum(points), max(points)))
+        if(max(points) >= NURBS_MAX_POINTS):
+            lines.append("    Warning: a NURBS curve reached the limit of {} points and is approximated coarser".format(NURBS_MAX_POINTS))
+        elif(max(points) > NURBS_WARNING_POINTS):
+            lines.append("    Warning: a NURBS curve was subdivided into more than {} points".format(NURBS_WARNING_POINTS))
+
+    if(stats["sampledCurves"] < stats["totalCurves"]):
+        lines.append("SVG size: about {:.1f} kB, SVGZ size: about {:.1f} kB, estimated from {} of {} curves".format(
+            stats["size"] / 1000, stats["compressedSize"] / 1000, stats["sampledCurves"], stats["totalCurves"]
+        ))
+    else:
+        lines.append("SVG size: {:.1f} kB, SVGZ size: {:.1f} kB".format(stats["size"] / 1000, stats["compressedSize"] / 1000))
+
+    if(tiled):
+        lines.append("Tiling is not reflected: tiles add pierces where curves are clipped and are written as separate files")
+
+    return "\n".join(lines)
+
+
+def getFeedRate(setting):
+    """Reads the optional feed rate column of a color setting
+
+    Args:
+        setting: (str[]) One row of the color settings
+
+    Returns:
+        float: Feed rate in mm/s, None if not set
+    """
+
+    try:
+        feedRate = float(setting[7])
+    except (IndexError, ValueError):
+        return None
+
+    return feedRate if feedRate > 0 else None
+
+
+def recordLength(record):
+    """Calculates the length of a curve record
+
+    Args:
+        record: (tuple) The curve record
+
+    Returns:
+        float: Length in cm
+    """
+
+    if(record[0] in ["line", "nurbs"]):
+        return sum(
+            math.hypot(x1 - x0, y1 - y0)
+            for x0, y0, x1, y1 in zip(record[1:-2:2], record[2:-2:2], record[3::2], record[4::2])
+        )
+
+    elif(record[0] == "arc"):
+        return record[3] * abs(record[8])
+
+    elif(record[0] == "circle"):
+        return 2 * math.pi * record[3]
+
+    elif(record[0] == "ellipse"):
+        # Ramanujan's approximation
+        a, b = record[3], record[4]
+        return math.pi * (3 * (a + b) - math.sqrt((3 * a + b) * (a + 3 * b)))
+
+    elif(record[0] == "ellarc"):
+        # Simpson's rule over the speed along the arc
+        c, u, v, t0, t1 = getEllipticalArcParameters(record)
+        n = 64
+        h = (t1 - t0) / n
+
+        def speed(t):
+            return math.hypot(v[0] * math.cos(t) - u[0] * math.sin(t), v[1] * math.cos(t) - u[1] * math.sin(t))
+
+        return h / 3 * sum(speed(t0 + i * h) * (1 if i in (0, n) else 4 if i % 2 else 2) for i in range(n + 1))
+
+    return 0
+
+
+class SizeEstimator:
+    """Text stream measuring what is written to it, plain and gzip compressed, without keeping it"""
+
+    def __init__(self):
+        self.size = 0
+        self.compressedSize = 0
+
+        # Same level and container as gzip.open
+        self.compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.size += len(data)
+        self.compressedSize += len(self.compressor.compress(data))
+        return len(text)
+
+    def close(self):
+        self.compressedSize += len(self.compressor.flush())
+
+
+def getBatches(converted, settings, outputMode, template, **fields):
+    """Splits converted entities into the files of a batch export
+
+    Args:
+        converted: ((int, str, str[], float[])[]) Converted entities, see convertEntities
+        settings: (str[][]) Color settings
+        outputMode: (str) OUTPUT_PER_COLOR or OUTPUT_PER_BODY
+        template: (str) Filename template, may use {group}, {name}, {index} and any of fields
+        fields: Further values of the template placeholders
+
+    Returns:
+        (str, tuple[])[]: Filename without extension and the entities to write into it, names are unique
+    """
+
+    checkTemplate(template, BATCH_TEMPLATE_FIELDS + list(fields))
+
+    if(outputMode == OUTPUT_PER_COLOR):
+        batches = [
+            (formatFilename(template, group=s[0], name=s[0], index=i, **fields), [e for e in converted if e[0] == i])
+            for i, s in enumerate(settings)
+        ]
+    else:
+        batches = [
+            (formatFilename(template, group=settings[e[0]][0], name=e[1], index=i, **fields), [e])
+            for i, e in enumerate(converted)
+        ]
+
+    batches = [b for b in batches if b[1]]
+
+    # Entities sharing a name would overwrite each other's file
+    return list(zip(uniqueFilenames([n for n, _ in batches]), [b for _, b in batches]))
+
+
+def writeSVGFile(filename, entities, settings, margin=0, moveToOrigin=False, compress=False, bounds=None, scale=1):
+    """Writes converted entities into a svg or svgz file
+
+    Args:
+        filename: (str) Path of the file to write
+        entities: ((int, str, str[], float[])[]) Color group index, name, paths and bounds of each entity
+        settings: (str[][]) Color settings
+        margin: (float) Space around the bounds in SVG units
+        moveToOrigin: (bool) Translates the geometry so the viewBox starts at 0 0
+        compress: (bool) Gzip compresses the file while it is written
+        bounds: (float[]) Bounds of the viewBox in SVG units, instead of the bounds of the entities
+        scale: (float) How many units are per SVG unit, for the canvas of an empty export
+    """
+
+    pathss, entityBounds = groupConvertedEntities(entities, settings)
+    bounds = bounds or entityBounds
+
+    if(compress):
+        file = gzip.open(filename, 'wt', encoding='utf-8')
+    else:
+        file = open(filename, 'w', encoding='utf-8')
+
+    with file:
+        writeSVG(file, pathss, settings, bounds, margin, moveToOrigin, scale)
+
+
+def buildSVG(entities, settings, margin=0, moveToOrigin=False, scale=1):
+    """Constructs a full svg from converted entities
+
+    Args:
+        entities: ((int, str, str[], float[])[]) Color group index, name, paths and bounds of each entity
+        settings: (str[][]) Color settings
+        margin: (float) Space around the bounds in SVG units
+        moveToOrigin: (bool) Translates the geometry so the viewBox starts at 0 0
+        scale: (float) How many units are per SVG unit, for the canvas of an empty export
+
+    Returns:
+        str: full svg
+    """
+
+    pathss, bounds = groupConvertedEntities(entities, settings)
+
+    return buildSVGFromPaths(pathss, settings, bounds, margin, moveToOrigin, scale)
+
+
+def groupConvertedEntities(entities, settings):
+    """Groups the paths of converted entities by color group
+
+    Args:
+        entities: ((int, str, str[], float[])[]) Color group index, name, paths and bounds of each entity
+        settings: (str[][]) Color settings
+
+    Returns:
+        (str[][][], float[]): Paths of each entity per color group and the bounds of all of them
+    """
+
+    pathss = [[e[2] for e in entities if e[0] == i] for i in range(len(settings))]
+    bounds = unionBounds([e[3] for e in entities])
+
+    return pathss, bounds
+
+
+def buildSVGFromPaths(pathss, settings, bounds=None, margin=0, moveToOrigin=False, scale=1):
+    """Constructs a full svg fle from paths
+
+    Args:
+        paths: (String[][]) SVG path data
+        bounds: (float[]) Bounds of the path data as accumulated during conversion, see newBounds
+        margin: (float) Space around the bounds in SVG units
+        moveToOrigin: (bool) Translates the geometry so the viewBox starts at 0 0
+        scale: (float) How many units are per SVG unit, for the canvas of an empty export
+
+    Returns:
+        [string]: full svg
+
+    """
+
+    rtn = io.StringIO()
+    writeSVG(rtn, pathss, settings, bounds, margin, moveToOrigin, scale)
+
+    return rtn.getvalue()
+
+
+def writeSVG(file, pathss, settings, bounds=None, margin=0, moveToOrigin=False, scale=1):
+    """Writes a full svg to a stream piece by piece
+
+    Args:
+        file: (TextIO) Stream to write to
+        paths: (String[][]) SVG path data
+        bounds: (float[]) Bounds of the path data as accumulated during conversion, see newBounds
+        margin: (float) Space around the bounds in SVG units
+        moveToOrigin: (bool) Translates the geometry so the viewBox starts at 0 0
+        scale: (float) How many units are per SVG unit, for the canvas of an empty export
+    """
+
+    # Falls back to a fixed canvas if no geometry was emitted
+    if(bounds is None or bounds[0] > bounds[2]):
+        bounds = [0, 0, EMPTY_CANVAS_SIZE[0] / scale, EMPTY_CANVAS_SIZE[1] / scale]
+
+    x = bounds[0] - margin
+    y = bounds[1] - margin
+    width = bounds[2] - bounds[0] + 2*margin
+    height = bounds[3] - bounds[1] + 2*margin
+
+    if(moveToOrigin):
+        file.write(r"<svg version='1.1' xmlns='http://www.w3.org/2000/svg' viewBox='0 0 {0:.6f} {1:.6f}' width='{0:.6f}px' height='{1:.6f}px'>\n".format(width, height))
+        file.write(r"<g transform='translate({0:.6f} {1:.6f})'>".format(-x, -y))
+    else:
+        file.write(r"<svg version='1.1' xmlns='http://www.w3.org/2000/svg' viewBox='{2:.6f} {3:.6f} {0:.6f} {1:.6f}' width='{0:.6f}px' height='{1:.6f}px'>\n".format(width, height, x, y))
+
+    for i, paths in enumerate(pathss):
+        for j, p in enumerate(paths):
+            for path in p:
+                file.write(r"    <path d='{}' id='{}_{}' stroke='rgb({},{},{})' stroke-width='{}' fill='none' fill-opacity='0.5'/> ".format(path, settings[i][0],j, settings[i][1], settings[i][2], settings[i][3], settings[i][4]))
+
+    if(moveToOrigin):
+        file.write(r"</g>")
+
+    file.write(r"</svg>")
+
+
+def formatFilename(template, **fields):
+    """Fills in a filename template, replacing characters not allowed in filenames
+
+    Args:
+        template: (str) Template such as "{document}_{name}_{index}"
+        fields: Values of the placeholders
+
+    Returns:
+        str: Filename without extension
+    """
+
+    return template.format(**{k: re.sub(r'[\\/:*?"<>|]', "_", str(v)).strip() for k, v in fields.items()})
+
+
+def checkTemplate(template, fields):
+    """Checks that a filename template can be filled in
+
+    Args:
+        template: (str) Template such as "{document}_{name}_{index}"
+        fields: (str[]) Names of the available placeholders
+
+    Raises:
+        ValueError: If the template is malformed or uses a placeholder not in fields
+    """
+
+    try:
+        names = [f for _, f, _, _ in string.Formatter().parse(template) if f is not None]
+    except ValueError as e:
+        raise ValueError("Invalid filename template \"{}\": {}".format(template, e))
+
+    for n in names:
+        if(re.split(r"[.\[]", n)[0] not in fields):
+            raise ValueError("Unknown placeholder {{{}}} in filename template, available are {}".format(n, ", ".join("{" + f + "}" for f in fields)))
+
+    # Format specs are checked by filling in placeholders like formatFilename does
+    try:
+        formatFilename(template, **dict.fromkeys(fields, ""))
+    except (ValueError, IndexError, KeyError, AttributeError) as e:
+        raise ValueError("Invalid filename template \"{}\": {}".format(template, e))
+
+
+def uniqueFilenames(names):
+    """Appends a counter to filenames used more than once, ignoring case
+
+    Args:
+        names: (str[]) Filenames
+
+    Returns:
+        str[]: Filenames in the same order, each used once
+    """
+
+    used = set()
+    rtn = []
+
+    for n in names:
+        name = n
+        i = 2
+        while(name.lower() in used):
+            name = "{}_{}".format(n, i)
+            i += 1
+
+        used.add(name.lower())
+        rtn.append(name)
+
+    return rtn
+
+
+def saveRecording(filename, entities, settings):
+    """Saves extracted entities and color settings into a packed binary file
+
+    Layout, little endian:
+        "SVGR", version (H)
+        group count (H), per group: settings row as string
+        entity count (I), per entity: group (H), closed (B), name as string, loop count (I)
+            per loop: isOuter (B), curve count (I)
+                per curve: type (B), invert (B), value count (I), values (d)
+    Strings are stored as byte length (H) followed by utf-8.
+
+    Args:
+        filename: (str) Path of the file to write
+        entities: (dict[]) Extracted entities
+        settings: (str[][]) Color settings
+    """
+
+    def packString(s):
+        b = s.encode("utf-8")
+        return struct.pack("<H", len(b)) + b
+
+    with open(filename, "wb") as file:
+        file.write(RECORDING_MAGIC + struct.pack("<H", RECORDING_VERSION))
+
+        file.write(struct.pack("<H", len(settings)))
+        for s in settings:
+            file.write(packString(",".join(s)))
+
+        file.write(struct.pack("<I", len(entities)))
+        for e in entities:
+            file.write(struct.pack("<HB", e["group"], e["closed"]))
+            file.write(packString(e["name"]))
+            file.write(struct.pack("<I", len(e["loops"])))
+
+            for l in e["loops"]:
+                file.write(struct.pack("<BI", l["isOuter"], len(l["curves"])))
+
+                for c, f in l["curves"]:
+                    file.write(struct.pack("<BBI{}d".format(len(c) - 1), CURVE_TYPES.index(c[0]), f, len(c) - 1, *c[1:]))
+
+
+def loadRecording(filename):
+    """Loads entities and color settings saved by saveRecording
+
+    Args:
+        filename: (str) Path of the file to read
+
+    Returns:
+        (dict[], str[][]): Extracted entities and color settings
+    """
+
+    with open(filename, "rb") as file:
+        data = file.read()
+
+    offset = 0
+
+    def unpack(fmt):
+        nonlocal offset
+        rtn = struct.unpack_from(fmt, data, offset)
+        offset += struct.calcsize(fmt)
+        return rtn
+
+    def unpackString():
+        nonlocal offset
+        length, = unpack("<H")
+        offset += length
+        return data[offset - length:offset].decode("utf-8")
+
+    if(data[:4] != RECORDING_MAGIC):
+        raise ValueError("Not a geometry recording: {}".format(filename))
+    offset = 4
+
+    version, = unpack("<H")
+    if(version > RECORDING_VERSION):
+        raise ValueError("Unsupported recording version {}: {}".format(version, filename))
+
+    groupCount, = unpack("<H")
+    settings = [unpackString().split(",") for _ in range(groupCount)]
+
+    entities = []
+    entityCount, = unpack("<I")
+    for _ in range(entityCount):
+        group, closed = unpack("<HB")
+        name = unpackString()
+        loopCount, = unpack("<I")
+
+        loops = []
+        for _ in range(loopCount):
+            isOuter, curveCount = unpack("<BI")
+
+            curves = []
+            for _ in range(curveCount):
+                curveType, invert, valueCount = unpack("<BBI")
+                values = unpack("<{}d".format(valueCount))
+                curves.append(((CURVE_TYPES[curveType],) + values, bool(invert)))
+
+            # Areas are not stored, as they follow from the curves
+            area = loopSignedArea(curves) if isLoopClosed(curves, closed) else 0
+            loops.append({"isOuter": bool(isOuter), "area": area, "curves": curves})
+
+        entities.append({"group": group, "name": name, "closed": bool(closed), "loops": loops})
+
+    return entities, settings
+
+
+def lerp(a, b, i):
+    """Linearly interpolates from a to b
+
+    Args:
+        a: (float) The value to interpolate from
+        b: (float) The value to interpolate to
+        i: (float) Interpolation factor
+
+    Returns:
+        float: Interpolation result
+    """
+    return a + (b-a)*i
@@ -6,6 +6,14 @@ import inspect
 import os
 import math
 
+from .ExportGeometry import (
+    OUTPUT_SINGLE_FILE, OUTPUT_PER_COLOR, OUTPUT_PER_BODY, ORDERINGS, NURBS_MAX_POINTS,
+    parseSettings, orderEntities, convertEntities, getBatches, writeSVGFile, buildSVG,
+    BATCH_TEMPLATE_FIELDS, TILE_TEMPLATE_FIELDS, checkTemplate,
+    RECORDING_EXTENSION, formatFilename, saveRecording, orientLoop, loopSignedArea, isLoopClosed, tileEntities, writeTiles,
+    collectStatistics, formatStatistics, lerp
+)
+
 
 # Global set of event handlers to keep them referenced for the duration of the command
 _handlers = []
@@ -23,6 +31,12 @@ script_dir = os.path.dirname(script_path)
 
 currentSettings = []
 
+# Memoized per entity while the command runs, so the preview only converts what changed
+# Keyed by entity token and color group index
+extractedCache = {}
+convertedCache = {}
+convertedScale = None
+
 
 # Fires when the CommandDefinition gets executed.
 # Responsible for adding commandInputs to the command &
@@ -45,6 +59,14 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
             cmd.inputChanged.add(onInputChanged)
             _handlers.append(onInputChanged)
 
+            # Registers the CommandExecutePreviewHandler
+            onExecutePreview = CommandExecutePreviewHandler()
+            cmd.executePreview.add(onExecutePreview)
+            _handlers.append(onExecutePreview)
+
+            global extractedCache, convertedCache
+            extractedCache = {}
+            convertedCache = {}
                 
             # Get the CommandInputs collection associated with the command.
             inputs = cmd.commandInputs
@@ -56,6 +78,38 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
 
             VIDPI = tabSelection.children.addValueInput("VIDPI", "DPI", "", adsk.core.ValueInput.createByReal(SVG_UNIT_FACTOR * 2.54))
 
+            VIMargin = tabSelection.children.addValueInput("VIMargin", "Margin", "mm", adsk.core.ValueInput.createByReal(0))
+
+            BVMoveToOrigin = tabSelection.children.addBoolValueInput("BVMoveToOrigin", "Move to origin", True, "", False)
+
+            BVCompress = tabSelection.children.addBoolValueInput("BVCompress", "Compress (SVGZ)", True, "", False)
+
+            DDOutput = tabSelection.children.addDropDownCommandInput("DDOutput", "Output", adsk.core.DropDownStyles.TextListDropDownStyle)
+            DDOutput.listItems.add(OUTPUT_SINGLE_FILE, True)
+            DDOutput.listItems.add(OUTPUT_PER_COLOR, False)
+            DDOutput.listItems.add(OUTPUT_PER_BODY, False)
+
+            SIFilenameTemplate = tabSelection.children.addStringValueInput("SIFilenameTemplate", "Filename", "{document}_{name}_{index}")
+            SIFilenameTemplate.isVisible = False
+
+            DDOrder = tabSelection.children.addDropDownCommandInput("DDOrder", "Order", adsk.core.DropDownStyles.TextListDropDownStyle)
+            for i, o in enumerate(ORDERINGS):
+                DDOrder.listItems.add(o, i == 0)
+
+            BVRecord = tabSelection.children.addBoolValueInput("BVRecord", "Save geometry recording", True, "", False)
+
+            BVPreflight = tabSelection.children.addBoolValueInput("BVPreflight", "Preflight only", True, "", False)
+
+            BVTile = tabSelection.children.addBoolValueInput("BVTile", "Tile to bed size", True, "", False)
+
+            VIBedWidth = tabSelection.children.addValueInput("VIBedWidth", "Bed width", "mm", adsk.core.ValueInput.createByReal(60))
+            VIBedHeight = tabSelection.children.addValueInput("VIBedHeight", "Bed height", "mm", adsk.core.ValueInput.createByReal(40))
+            VIOverlap = tabSelection.children.addValueInput("VIOverlap", "Tile overlap", "mm", adsk.core.ValueInput.createByReal(0))
+            BVMarks = tabSelection.children.addBoolValueInput("BVMarks", "Registration marks", True, "", False)
+
+            for i in [VIBedWidth, VIBedHeight, VIOverlap, BVMarks]:
+                i.isVisible = False
+
             settingText = "red, 255, 0, 0, 1\nblack, 0, 0, 0, 1"
 
             # Tries to open settings.csv file
@@ -67,7 +121,7 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
                 print(traceback.format_exc())
 
             # Parses settings string
-            settings = [i.split(",") for i in settingText.split("\n")]
+            settings = parseSettings(settingText)
 
             global currentSettings
             currentSettings = settings
@@ -79,10 +133,12 @@ class CommandCreatedHandler(adsk.core.CommandCreatedEventHandler):
                 si.addSelectionFilter("SketchCurves")
                 si.setSelectionLimits(0, 0)
 
+            BIPreview = tabSelection.children.addBrowserCommandInput("BIPreview", "Preview", os.path.join(script_dir, "resources", "preview.html"), 200)
+
             TBSettings = tabSettings.children.addTextBoxCommandInput("TBSettings", "", settingText, 10, False)
             TBSettings.isFullWidth = True
 
-            TBInfo = tabSettings.children.addTextBoxCommandInput("TBInfo", "", "Color settings\nFormat:\nname, r, g, b, stroke-width\n\nClose command to apply.",5, True)
+            TBInfo = tabSettings.children.addTextBoxCommandInput("TBInfo", "", "Color settings\nFormat:\nname, r, g, b, stroke-width[, hatch-spacing (mm), hatch-angle (deg), feed-rate (mm/s)]\n\nClose command to apply.",5, True)
             TBInfo.isFullWidth = True
 
             BVReset = tabSettings.children.addBoolValueInput("BVReset", "    Reset Settings    ", False)
@@ -111,45 +167,99 @@ class CommandExecuteHandler(adsk.core.CommandEventHandler):
             global SVG_UNIT_FACTOR
             
             # Getting selections now, as creating sketches clears em
-            selections = []
-            for i in currentSettings:
-                _ = []
-
-                for j in range(args.command.commandInputs.itemById(i[0]).selectionCount):
-                    _.append(args.command.commandInputs.itemById(i[0]).selection(j).entity)
-
-                selections.append(_)
-
-            paths = []
-            for i in selections:
-                _ = []
-                for s in i:
-                    if(s.objectType == "adsk::fusion::BRepBody"):
-                        sketch = root.sketches.add(root.xYConstructionPlane)
-                        sketch.project(s)
-                        _.append(sketchToSVGPaths(sketch))
-                        sketch.deleteMe()
-                    else:
-                        sketch = root.sketches.add(root.xYConstructionPlane)
-                        sketch.project(s)
-                        _.append([curveToPathSegment(j, 1/SVG_UNIT_FACTOR, False, True) for j in sketch.sketchCurves])
-                        sketch.deleteMe()
-                paths.append(_)
-
-            svg = buildSVGFromPaths(paths, currentSettings)
-
-
-            fileDialog = ui.createFileDialog()
-            fileDialog.isMultiSelectEnabled = False
-            fileDialog.title = "Specify result filename"
-            fileDialog.filter = 'SVG files (*.svg)'
-            fileDialog.filterIndex = 0
-            dialogResult = fileDialog.showSave()
-            if dialogResult == adsk.core.DialogResults.DialogOK:
-                filename = fileDialog.filename
-                output = open(filename, 'w')
-                output.writelines(svg)
-                output.close()
+            selections = getSelections(args.command.commandInputs)
+
+            inputs = args.command.commandInputs
+            margin = inputs.itemById("VIMargin").value
+            moveToOrigin = inputs.itemById("BVMoveToOrigin").value
+            compress = inputs.itemById("BVCompress").value
+            outputMode = inputs.itemById("DDOutput").selectedItem.name
+            template = inputs.itemById("SIFilenameTemplate").value
+            ordering = inputs.itemById("DDOrder").selectedItem.name
+            record = inputs.itemById("BVRecord").value
+            tile = inputs.itemById("BVTile").value
+            preflight = inputs.itemById("BVPreflight").value
+
+            entities = []
+            for i, sel in enumerate(selections):
+                for s in sel:
+                    entities.append(getExtractedEntity(s, i, root))
+
+            entities = orderEntities(entities, ordering)
+
+            # Reports what the export would produce instead of writing it
+            if(preflight):
+                stats = collectStatistics(entities, currentSettings, 1/SVG_UNIT_FACTOR, margin * SVG_UNIT_FACTOR, moveToOrigin)
+                ui.messageBox(formatStatistics(stats, tile), "Export preflight")
+                return
+
+            # Converts every selected entity on its own, so it can be written alone in batch mode
+            # Tiles are converted after clipping
+            converted = [] if tile else convertEntities(entities, currentSettings, 1/SVG_UNIT_FACTOR)
+
+            extension = ".svgz" if compress else ".svg"
+
+            if(outputMode == OUTPUT_SINGLE_FILE and not tile):
+                fileDialog = ui.createFileDialog()
+                fileDialog.isMultiSelectEnabled = False
+                fileDialog.title = "Specify result filename"
+                fileDialog.filter = 'Compressed SVG files (*.svgz)' if compress else 'SVG files (*.svg)'
+                fileDialog.filterIndex = 0
+                dialogResult = fileDialog.showSave()
+                if dialogResult == adsk.core.DialogResults.DialogOK:
+                    writeSVGFile(fileDialog.filename, converted, currentSettings, margin * SVG_UNIT_FACTOR, moveToOrigin, compress, scale=1/SVG_UNIT_FACTOR)
+
+                    if(record):
+                        saveRecording(os.path.splitext(fileDialog.filename)[0] + RECORDING_EXTENSION, entities, currentSettings)
+
+            else:
+                # Reports a template that can't be filled in before anything is written
+                try:
+                    checkTemplate(template, (TILE_TEMPLATE_FIELDS if tile else BATCH_TEMPLATE_FIELDS) + ["document"])
+                except ValueError as e:
+                    ui.messageBox(str(e), "Export To SVG")
+                    return
+
+                # Asks for the folder only once for the whole batch
+                folderDialog = ui.createFolderDialog()
+                folderDialog.title = "Specify result folder"
+                dialogResult = folderDialog.showDialog()
+                if dialogResult != adsk.core.DialogResults.DialogOK:
+                    return
+
+                document = app.activeDocument.name
+
+                if(tile):
+                    tiles = tileEntities(
+                        entities,
+                        currentSettings,
+                        inputs.itemById("VIBedWidth").value,
+                        inputs.itemById("VIBedHeight").value,
+                        inputs.itemById("VIOverlap").value,
+                        inputs.itemById("BVMarks").value
+                    )
+                    writeTiles(folderDialog.folder, tiles, currentSettings, 1/SVG_UNIT_FACTOR, template, compress, document=document)
+
+                else:
+                    for name, batch in getBatches(converted, currentSettings, outputMode, template, document=document):
+                        writeSVGFile(os.path.join(folderDialog.folder, name + extension), batch, currentSettings, margin * SVG_UNIT_FACTOR, moveToOrigin, compress, scale=1/SVG_UNIT_FACTOR)
+
+                if(record):
+                    saveRecording(os.path.join(folderDialog.folder, formatFilename("{document}", document=document) + RECORDING_EXTENSION), entities, currentSettings)
+        except:
+            print(traceback.format_exc())
+
+
+
+# Fires when the Command needs to preview its result
+# Responsible for updating the preview of the export
+class CommandExecutePreviewHandler(adsk.core.CommandEventHandler):
+    def __init__(self):
+        super().__init__()
+    def notify(self, args):
+        try:
+            # Follows every input change, the projections it makes are rolled back by Fusion
+            updatePreview(args.command.commandInputs)
         except:
             print(traceback.format_exc())
 
@@ -176,6 +286,16 @@ class CommandInputChangedHandler(adsk.core.InputChangedEventHandler):
 
                 SVG_UNIT_FACTOR = args.input.parentCommand.commandInputs.itemById("VIDPI").value / 2.54
 
+            # Filename template is only used in batch mode, tile settings when tiling
+            elif args.input.id in ["DDOutput", "BVTile"]:
+                inputs = args.input.parentCommand.commandInputs
+                tile = inputs.itemById("BVTile").value
+
+                inputs.itemById("SIFilenameTemplate").isVisible = tile or inputs.itemById("DDOutput").selectedItem.name != OUTPUT_SINGLE_FILE
+
+                for i in ["VIBedWidth", "VIBedHeight", "VIOverlap", "BVMarks"]:
+                    inputs.itemById(i).isVisible = tile
+
             # Resets the settings and writes them to file
             elif args.input.id == "BVReset":
                 args.input.parentCommand.commandInputs.itemById("TBSettings").text = "red, 255, 0, 0, 1\nblack, 0, 0, 0, 1"
@@ -189,36 +309,6 @@ class CommandInputChangedHandler(adsk.core.InputChangedEventHandler):
 
 
 
-def buildSVGFromPaths(pathss, settings, width=50, height=25):
-    """Constructs a full svg fle from paths
-
-    Args:
-        paths: (String[][]) SVG path data
-        width: (float) Width ouf bounding rectangle
-        height: (float) Height of bounding rectangle
-
-    Returns:
-        [string]: full svg
-
-    """
-    global SVG_UNIT_FACTOR
-
-    rtn = ""
-
-
-    rtn += r"<svg version='1.1' xmlns='http://www.w3.org/2000/svg' viewBox='0 0 {0} {1}' width='{0}px' height='{1}px'>\n".format(width*SVG_UNIT_FACTOR, height*SVG_UNIT_FACTOR)
-
-    #rtn += r"<rect width='{}' height='{}' stroke='black' stroke-width='2' fill-opacity='0'/> ".format(width*SVG_UNIT_FACTOR, height*SVG_UNIT_FACTOR)
-    for i, paths in enumerate(pathss):
-        for j, p in enumerate(paths):
-            for path in p:
-                rtn += r"    <path d='{}' id='{}_{}' stroke='rgb({},{},{})' stroke-width='{}' fill='none' fill-opacity='0.5'/> ".format(path, settings[i][0],j, settings[i][1], settings[i][2], settings[i][3], settings[i][4])
-
-    rtn += r"</svg>"
-
-    return rtn
-
-
 def getTransformsFromSVG(svg):
     """Imports SVG result from svgnest and extracts transform data
 
@@ -259,536 +349,262 @@ def getTransformsFromSVG(svg):
     return zip(ids, transformsScaled)
     
 
-def sketchToSVGPaths(sketch):
-    """Converts a Sketch into a SVG Path date
+def getSelections(inputs):
+    """Gets the selected entities of all color groups
 
     Args:
-        sketch: (Sketch) Sketch to convert
+        inputs: (CommandInputs) Inputs of the command
 
     Returns:
-        [str]: Array of SVG paths
+        Base[][]: Selected entities per color group
     """
 
-    rtn = ""
+    global currentSettings
 
-    sortedProfiles = sorted(sketch.profiles, key=lambda x: len(x.profileLoops), reverse=True)
-
-    """for p in sketch.profiles:
-        for pl in p.profileLoops:
-
-            if(pl.isOuter):
-                rtn.append(loopToSVGPath(pl))
-                break
-    """
+    selections = []
+    for i in currentSettings:
+        _ = []
 
+        for j in range(inputs.itemById(i[0]).selectionCount):
+            _.append(inputs.itemById(i[0]).selection(j).entity)
 
-    for pl in sortedProfiles[0].profileLoops:
-        # Outer should be clockwise
-        # Inner should be counterclockwise
-        if(pl.isOuter != isLoopClockwise(pl)):
-            rtn += loopToSVGPath(pl, True)
-        else:
-            rtn += loopToSVGPath(pl, False)
+        selections.append(_)
 
-    return [rtn]
+    return selections
 
 
-def loopToSVGPath(loop, reverse = False):
-    """Converts a ProfileLoop into a SVG Path date
+def getExtractedEntity(entity, group, root):
+    """Extracts an entity, reusing the result of earlier extractions
 
     Args:
-        loop: (ProfileLoop) Loop to convert
-        reverse: (Bool) Invert direction
+        entity: (BRepBody or SketchCurve) The selected entity
+        group: (int) Index of the color group it was selected for
+        root: (Component) Component to create the temporary sketch in
 
     Returns:
-        str: SVG Path data
+        dict: Extracted entity, see ExportGeometry
     """
-    
-    global SVG_UNIT_FACTOR
 
-    rtn = ""
+    global extractedCache
 
-    profileCurves = [i for i in loop.profileCurves]
+    key = (entity.entityToken, group)
 
-    if(reverse):
-        profileCurves.reverse()
+    if(key not in extractedCache):
+        extractedCache[key] = extractEntity(entity, group, root)
 
-    flip = getWhatCurvesToFlip(profileCurves)
+    return extractedCache[key]
 
-    if(reverse and len(flip) == 1):
-        flip = [not(i) for i in flip]
 
+def updatePreview(inputs):
+    """Shows the export of the current selection in the preview
 
-    for c, f in zip(profileCurves, flip):
-        rtn += curveToPathSegment(
-            c,
-            1/SVG_UNIT_FACTOR,
-            f,
-            not rtn
-        )
-    return rtn
-
-
-def curveToPathSegment(curve, scale=1, invert=False, moveTo=False):
-    """Converts a ProfileCurve into a SVG Path date segment
+    Only entities selected since the last update get extracted and converted.
+    DPI changes reconvert from the memoized extractions.
 
     Args:
-        curve: (ProfileCurve) The curve object to be converted
-        scale: (float) How many units are per SVG unit
-        invert: (bool) Swaps curve's startPoint and endPoint
-        moveTo: (bool) Moves to the startPoint before conversion
-
-    Returns:
-        str: Segment of SVG Path data.
-
+        inputs: (CommandInputs) Inputs of the command
     """
 
-    rtn = ""
+    global currentSettings, extractedCache, convertedCache, convertedScale, SVG_UNIT_FACTOR
 
+    root = adsk.core.Application.get().activeProduct.rootComponent
 
-    if(curve.geometry.objectType == "adsk::core::Line3D"):
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.startPoint.x / scale,
-                    -curve.geometry.startPoint.y / scale
-                )
+    selections = getSelections(inputs)
+    keys = [(s.entityToken, i) for i, sel in enumerate(selections) for s in sel]
+    selected = set(keys)
 
-            rtn += "L{0:.6f} {1:.6f} ".format(
-                curve.geometry.endPoint.x / scale,
-                -curve.geometry.endPoint.y / scale)
+    # Forgets deselected entities
+    for key in list(extractedCache):
+        if(key not in selected):
+            del extractedCache[key]
+            convertedCache.pop(key, None)
 
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.endPoint.x / scale,
-                    -curve.geometry.endPoint.y / scale
-                )
+    if(convertedScale != 1/SVG_UNIT_FACTOR):
+        convertedCache = {}
+        convertedScale = 1/SVG_UNIT_FACTOR
 
-            rtn += "L{0:.6f} {1:.6f} ".format(
-                curve.geometry.startPoint.x / scale,
-                -curve.geometry.startPoint.y / scale)
-    
-    elif(curve.geometry.objectType == "adsk::core::Arc3D"):
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.startPoint.x / scale,
-                    -curve.geometry.startPoint.y / scale
-                )
-
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                0,
-                curve.geometry.endPoint.x / scale,
-                -curve.geometry.endPoint.y / scale
-            )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    curve.geometry.endPoint.x / scale,
-                    -curve.geometry.endPoint.y / scale
-                )
-
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                1,
-                curve.geometry.startPoint.x / scale,
-                -curve.geometry.startPoint.y / scale
-            )
-    
-    elif(curve.geometry.objectType == "adsk::core::Circle3D"):
-        sp = curve.geometry.center.copy()
-        sp.translateBy(adsk.core.Vector3D.create(curve.geometry.radius, 0, 0))
-
-        ep = curve.geometry.center.copy()
-        ep.translateBy(adsk.core.Vector3D.create(0, curve.geometry.radius, 0))
-
-        if(not invert):
-
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
-
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                1,
-                1,
-                ep.x / scale,
-                -ep.y / scale
-            )
-
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                0,
-                1,
-                sp.x / scale,
-                -sp.y / scale
-            )
-
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
-
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                0,
-                0,
-                ep.x / scale,
-                -ep.y / scale
-            )
-
-            rtn += "A {0:.6f} {0:.6f} 0 {1:.0f} {2:.0f} {3:.6f} {4:.6f}".format(
-                curve.geometry.radius / scale,
-                1,
-                0,
-                sp.x / scale,
-                -sp.y / scale
-            )
+    for i, sel in enumerate(selections):
+        for s in sel:
+            key = (s.entityToken, i)
+            if(key not in convertedCache):
+                convertedCache[key] = convertEntities([getExtractedEntity(s, i, root)], currentSettings, convertedScale)[0]
 
-    
-    elif(curve.geometry.objectType == "adsk::core::Ellipse3D"):
-        sp = curve.geometry.center.copy()
-        la = curve.geometry.majorAxis.copy()
-        la.normalize()
-        la.scaleBy(curve.geometry.majorRadius)
-        sp.translateBy(la)
-
-        ep = curve.geometry.center.copy()
-        sa = adsk.core.Vector3D.crossProduct(curve.geometry.majorAxis, adsk.core.Vector3D.create(0,0,1))
-        sa.normalize()
-        sa.scaleBy(curve.geometry.minorRadius)
-        ep.translateBy(sa)
-        
-        angle = -math.degrees(math.atan2(la.y, la.x))
-
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
-
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                1,
-                0,
-                ep.x / scale,
-                -ep.y / scale
-            )
-
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                0,
-                0,
-                sp.x / scale,
-                -sp.y / scale
-            )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
-
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                0,
-                1,
-                ep.x / scale,
-                -ep.y / scale
-            )
-
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                1,
-                1,
-                sp.x / scale,
-                -sp.y / scale
-            )
-
-
-    elif(curve.geometry.objectType == "adsk::core::EllipticalArc3D"):
-        angle = -math.degrees(math.atan2(curve.geometry.majorAxis.y, curve.geometry.majorAxis.x))
-
-        _, sp, ep = curve.geometry.evaluator.getEndPoints()
-
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    sp.x / scale,
-                    -sp.y / scale
-                )
-
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                0,
-                ep.x / scale,
-                -ep.y / scale
-            )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    ep.x / scale,
-                    -ep.y / scale
-                )
-
-            # rx ry rot large_af sweep_af x y
-            rtn += "A {0:.6f} {1:.6f} {2:.6f} {3:.0f} {4:.0f} {5:.6f} {6:.6f}".format(
-                curve.geometry.majorRadius / scale,
-                curve.geometry.minorRadius / scale,
-                angle,
-                curve.geometry.endAngle-curve.geometry.startAngle > math.pi,
-                1,
-                sp.x / scale,
-                -sp.y / scale
-            )
-
-    elif(curve.geometry.objectType == "adsk::core::NurbsCurve3D"):
-        # Aproximates nurbs with straight line segments
+    svg = buildSVG(
+        [convertedCache[k] for k in keys],
+        currentSettings,
+        inputs.itemById("VIMargin").value * SVG_UNIT_FACTOR,
+        inputs.itemById("BVMoveToOrigin").value,
+        convertedScale
+    )
 
-        ev = curve.geometry.evaluator
-        _, sp, ep = ev.getParameterExtents()
+    inputs.itemById("BIPreview").sendInfoToHTML("update", svg)
 
-        # List of segments, initially subdivided into two segments
-        s = [sp, lerp(sp, ep, 0.5), ep]
-        
-        # Maxiumum angle two neighboring segments can have 
-        maxAngle = math.radians(10)
 
-        # Minimum length of segment
-        minLength = 0.05
+def extractEntity(entity, group, root):
+    """Projects a selected entity onto the XY plane and extracts its geometry
 
-        i = 0
-        while(i < len(s)-1):
-            _, t = ev.getTangents(s)
-            _, p = ev.getPointsAtParameters(s)
+    Args:
+        entity: (BRepBody or SketchCurve) The selected entity
+        group: (int) Index of the color group it was selected for
+        root: (Component) Component to create the temporary sketch in
 
-            # If the angle to the next segment is small enough, move one
-            if( t[i].angleTo( t[i+1]) < maxAngle or p[i].distanceTo(p[i+1]) < minLength):
-                i += 1
-            # Otherwise subdivide the next segment into two
-            else:
-                s.insert(i+1, lerp( s[i], s[i+1], 0.5))
+    Returns:
+        dict: Extracted entity, see ExportGeometry
+    """
 
-        if(not invert):
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    p[0].x / scale,
-                    -p[0].y / scale
-                )
-            for i in p[1:]:
-                rtn += "L{0:.6f} {1:.6f} ".format(
-                    i.x / scale,
-                    -i.y / scale
-                )
-        else:
-            if(moveTo):
-                rtn += "M{0:.6f} {1:.6f} ".format(
-                    p[-1].x / scale,
-                    -p[-1].y / scale
-                )
-            for i in reversed(p[:-1]):
-                rtn += "L{0:.6f} {1:.6f} ".format(
-                    i.x / scale,
-                    -i.y / scale
-                )
+    sketch = root.sketches.add(root.xYConstructionPlane)
+    sketch.project(entity)
 
+    if(entity.objectType == "adsk::fusion::BRepBody"):
+        rtn = {"group": group, "name": entity.name, "closed": True, "loops": sketchToLoops(sketch)}
     else:
-        print("Warning: Unsupported curve type, could not be converted: {}".format(curve.geometryType))
+        curvess = [[(curveToRecord(c), False)] for c in sketch.sketchCurves]
+
+        # Only closed curves enclose an area, the chord term of open ones depends on their position
+        rtn = {
+            "group": group,
+            "name": entity.parentSketch.name,
+            "closed": False,
+            "loops": [
+                {"isOuter": True, "area": loopSignedArea(curves) if isLoopClosed(curves) else 0, "curves": curves}
+                for curves in curvess if curves[0][0]
+            ]
+        }
+
+    sketch.deleteMe()
+
     return rtn
 
 
-def isLoopClockwise(loop):
-    """Determins if a ProfileLoop is clockwise
+def sketchToLoops(sketch):
+    """Extracts the outline and holes of a projected body
 
     Args:
-        loop: (ProfileLoop) The loop to check
+        sketch: (Sketch) Sketch to convert
 
     Returns:
-        bool: True if clockwise.
+        dict[]: Loops, see ExportGeometry
     """
 
-    # If if it has only one segment it is clockwise by definition
-    if(len(loop.profileCurves) == 1):
-        return False;
+    rtn = []
 
-    # https://stackoverflow.com/questions/1165647/how-to-determine-if-a-list-of-polygon-points-are-in-clockwise-order
-    res = 0
+    """for p in sketch.profiles:
+        for pl in p.profileLoops:
 
-    sp = [getStartPoint(i.geometry) for i in loop.profileCurves]
-    ep = [getEndPoint(i.geometry) for i in loop.profileCurves]
-    
+            if(pl.isOuter):
+                rtn.append(loopToSVGPath(pl))
+                break
+    """
 
-    # range(len()) one of the deally sins of python
-    for s, e in zip(sp, ep):
-        res += (e.x - s.x) * (e.y + s.y)
 
-    return res > 0
+    # Outer loops end up clockwise, inner loops counterclockwise
+    for pl in getOuterProfile(sketch).profileLoops:
+        records = [curveToRecord(c) for c in pl.profileCurves]
+        rtn.append(orientLoop([r for r in records if r], pl.isOuter))
 
+    return rtn
 
-def getWhatCurvesToFlip(curves):
-    """Determins which ProfileCurves need their startPoint and endPoint flipped to line up end to end
+
+def getOuterProfile(sketch):
+    """Gets the profile of a projected body, the one containing the most loops
 
     Args:
-        curves: (ProfileCurves) The List of points to check agains
+        sketch: (Sketch) Sketch the body was projected into
 
     Returns:
-        bool[]: List of bools of equal length to curves.
+        Profile: Profile with the outline and all holes of the body
     """
 
-    if(len(curves)==1):
-        return [False]
-    else:
-        rtn = []
-
-        for i in range(len(curves)):
-            if(i==0):
-                rtn.append(
-                    isPointInList(
-                        getStartPoint(curves[i].geometry),
-                        [getStartPoint(curves[1].geometry), getEndPoint(curves[1].geometry)]
-                    )
-                )
-            else:
-                rtn.append(
-                    not isPointInList(
-                        getStartPoint(curves[i].geometry),
-                        [getStartPoint(curves[i-1].geometry), getEndPoint(curves[i-1].geometry)]
-                        )
-                )
-        return rtn
+    return max(sketch.profiles, key=lambda x: len(x.profileLoops))
 
 
-def getStartPoint(curve):
-    """Gets the start point of any Curve3D object
+def curveToRecord(curve):
+    """Converts a ProfileCurve or SketchCurve into a curve record
 
     Args:
-        curves: (Curve3D) The curve
+        curve: (ProfileCurve) The curve object to be converted
 
     Returns:
-        Point3D: Start point of the curve
-    """
-
-    if(curve.objectType in ["adsk::core::Line3D", "adsk::core::Arc3D"]):
-        return curve.startPoint
-
-    elif(curve.objectType == "adsk::core::Circle3D"):
-        sp = curve.center.copy()
-        sp.translateBy(adsk.core.Vector3D.create(curve.radius, 0, 0))
-        return sp
-
-    elif(curve.objectType == "adsk::core::Ellipse3D"):
-        sp = curve.center.copy()
-        la = curve.majorAxis.copy()
-        la.normalize()
-        la.scaleBy(curve.majorRadius)
-        sp.translateBy(la)
-        return sp
-
-    elif(curve.objectType in ["adsk::core::EllipticalArc3D", "adsk::core::NurbsCurve3D"]):
-        _, sp, ep = curve.evaluator.getEndPoints()
-        return sp
+        tuple: Curve record, see ExportGeometry. None if the curve type is not supported
 
+    """
 
-def getEndPoint(curve):
-    """Gets the end point of any Curve3D object
+    g = curve.geometry
 
-    Args:
-        curves: (Curve3D) The curve
+    if(g.objectType == "adsk::core::Line3D"):
+        return ("line", g.startPoint.x, g.startPoint.y, g.endPoint.x, g.endPoint.y)
 
-    Returns:
-        Point3D: End point of the curve
-    """
+    elif(g.objectType == "adsk::core::Arc3D"):
+        # Arcs run counterclockwise around their normal
+        sweep = g.endAngle - g.startAngle
+        if(g.normal.z < 0):
+            sweep = -sweep
 
-    if(curve.objectType in ["adsk::core::Line3D", "adsk::core::Arc3D"]):
-        return curve.endPoint
+        return ("arc", g.center.x, g.center.y, g.radius, g.startPoint.x, g.startPoint.y, g.endPoint.x, g.endPoint.y, sweep)
 
-    elif(curve.objectType == "adsk::core::Circle3D"):
-        ep = curve.center.copy()
-        ep.translateBy(adsk.core.Vector3D.create(curve.radius, 0, 0))
-        return ep
+    elif(g.objectType == "adsk::core::Circle3D"):
+        return ("circle", g.center.x, g.center.y, g.radius)
 
-    elif(curve.objectType == "adsk::core::Ellipse3D"):
-        ep = curve.center.copy()
-        la = curve.majorAxis.copy()
+    elif(g.objectType == "adsk::core::Ellipse3D"):
+        la = g.majorAxis.copy()
         la.normalize()
-        la.scaleBy(curve.majorRadius)
-        ep.translateBy(la)
-        return ep
 
-    elif(curve.objectType in ["adsk::core::EllipticalArc3D", "adsk::core::NurbsCurve3D"]):
-        _, sp, ep = curve.evaluator.getEndPoints()
-        return ep
+        return ("ellipse", g.center.x, g.center.y, g.majorRadius, g.minorRadius, la.x, la.y)
 
+    elif(g.objectType == "adsk::core::EllipticalArc3D"):
+        u = g.majorAxis.copy()
+        u.normalize()
+        v = g.normal.crossProduct(u)
+        v.normalize()
 
-def isPointInList(point, pointList, tol=1e-4):
-    """Determins if a Point3D is almost-equal to a Point3D in a list
+        # Parameters of the end points, measured from the major axis
+        _, sp, ep = g.evaluator.getEndPoints()
+        s = g.center.vectorTo(sp)
+        e = g.center.vectorTo(ep)
+        t0 = math.atan2(s.dotProduct(v) / g.minorRadius, s.dotProduct(u) / g.majorRadius)
+        t1 = math.atan2(e.dotProduct(v) / g.minorRadius, e.dotProduct(u) / g.majorRadius)
 
-    Args:
-        point: (Point3D) The Point to be checked
-        pointList: (Point3D[]) The List of points to check agains
-        tol: (float) Tollerance for almost-equality
+        sweep = (t1 - t0) % (2*math.pi)
+        if(g.normal.z < 0):
+            sweep = -sweep
 
-    Returns:
-        bool: True if almost equal to any Point in list
-    """
+        return ("ellarc", g.center.x, g.center.y, g.majorRadius, g.minorRadius, u.x, u.y, sp.x, sp.y, ep.x, ep.y, sweep)
 
-    for i in pointList:
-        if(isPointEqual(point, i, tol)):
-            return True
-    return False
+    elif(g.objectType == "adsk::core::NurbsCurve3D"):
+        # Aproximates nurbs with straight line segments
 
+        ev = g.evaluator
+        _, sp, ep = ev.getParameterExtents()
 
-def isPointEqual(point1, point2, tol=1e-4):
-    """Determins if a Point3D is almost-equal to a Point3D in a list
+        # List of segments, initially subdivided into two segments
+        s = [sp, lerp(sp, ep, 0.5), ep]
+        
+        # Maxiumum angle two neighboring segments can have 
+        maxAngle = math.radians(10)
 
-    Args:
-        point1: (Point3D) The Point to be checked
-        point2: (Point3D) The Points to check agains
-        tol: (float) Tollerance for almost-equality
+        # Minimum length of segment
+        minLength = 0.05
 
-    Returns:
-        bool: True if almost equal to point
-    """
-    return math.isclose(point1.x, point2.x, rel_tol=tol) and math.isclose(point1.y, point2.y, rel_tol=tol) and math.isclose(point1.z, point2.z, rel_tol=tol)
+        i = 0
+        while(i < len(s)-1):
+            # Only the ends of the next segment are evaluated, so subdividing stays linear
+            _, t = ev.getTangents(s[i:i+2])
+            _, p = ev.getPointsAtParameters(s[i:i+2])
 
+            # If the angle to the next segment is small enough, move one
+            # Runaway subdivision stops at the point limit, the preflight reports curves reaching it
+            if( t[0].angleTo( t[1]) < maxAngle or p[0].distanceTo(p[1]) < minLength or len(s) >= NURBS_MAX_POINTS):
+                i += 1
+            # Otherwise subdivide the next segment into two
+            else:
+                s.insert(i+1, lerp( s[i], s[i+1], 0.5))
 
-def lerp(a, b, i):
-    """Linearly interpolates from a to b
+        _, p = ev.getPointsAtParameters(s)
 
-    Args:
-        a: (float) The value to interpolate from
-        b: (float) The value to interpolate to
-        i: (float) Interpolation factor
+        return ("nurbs",) + tuple(c for i in p for c in (i.x, i.y))
 
-    Returns:
-        float: Interpolation result
-    """
-    return a + (b-a)*i
+    else:
+        print("Warning: Unsupported curve type, could not be converted: {}".format(curve.geometryType))
 
 
 def run(context):
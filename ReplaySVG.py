@@ -0,0 +1,94 @@
+#Author-ortus
+#Description-Rebuilds SVG files from a geometry recording without Fusion360
+#
+# Usage: python ReplaySVG.py recording.svgrec output.svg [options]
+# Run with --help for all options.
+
+import argparse
+import os
+import sys
+
+from ExportGeometry import (
+    OUTPUT_PER_COLOR, OUTPUT_PER_BODY, ORDERINGS, ORDER_SELECTION,
+    parseSettings, orderEntities, convertEntities, getBatches, writeSVGFile, loadRecording,
+    tileEntities, writeTiles, collectStatistics, formatStatistics,
+    BATCH_TEMPLATE_FIELDS, TILE_TEMPLATE_FIELDS, checkTemplate
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuilds SVG files from a geometry recording saved by Export To SVG")
+    parser.add_argument("recording", help="Geometry recording (.svgrec)")
+    parser.add_argument("output", nargs="?", help="Output file, or folder in batch mode")
+    parser.add_argument("--settings", help="Color settings file to use instead of the recorded settings")
+    parser.add_argument("--dpi", type=float, default=72, help="SVG units per inch (default: 72)")
+    parser.add_argument("--margin", type=float, default=0, help="Space around the geometry in mm")
+    parser.add_argument("--move-to-origin", action="store_true", help="Translate the geometry so the viewBox starts at 0 0")
+    parser.add_argument("--compress", action="store_true", help="Write gzip compressed SVGZ files")
+    parser.add_argument("--order", choices=ORDERINGS, default=ORDER_SELECTION, help="Order of entities and loops")
+    parser.add_argument("--split", choices=["color", "body"], help="Write one file per color group or per body into the output folder")
+    parser.add_argument("--template", default="{document}_{name}_{index}", help="Filename template in batch mode")
+    parser.add_argument("--tile", type=float, nargs=2, metavar=("WIDTH", "HEIGHT"), help="Split into tiles of the bed size in mm, written into the output folder")
+    parser.add_argument("--overlap", type=float, default=0, help="Overlap of neighbouring tiles in mm")
+    parser.add_argument("--marks", action="store_true", help="Add registration marks to the tiles")
+    parser.add_argument("--workers", type=int, default=4, help="Number of tile files written at the same time")
+    parser.add_argument("--stats", action="store_true", help="Print counts, cut length, cutting time and file sizes instead of writing files")
+    parser.add_argument("--exact-size", action="store_true", help="Converts everything for --stats to report exact instead of estimated file sizes")
+    args = parser.parse_args(argv)
+
+    if(not args.output and not args.stats):
+        parser.error("an output is required unless --stats is given")
+
+    if(args.split or args.tile):
+        try:
+            checkTemplate(args.template, (TILE_TEMPLATE_FIELDS if args.tile else BATCH_TEMPLATE_FIELDS) + ["document"])
+        except ValueError as e:
+            parser.error(str(e))
+
+    entities, settings = loadRecording(args.recording)
+
+    if(args.settings):
+        with open(args.settings, "r") as file:
+            settings = parseSettings(file.read())
+
+    # Scale and margin in the units used by the add-in, cm and SVG units per cm
+    unitFactor = args.dpi / 2.54
+    margin = args.margin / 10 * unitFactor
+
+    entities = orderEntities(entities, args.order)
+
+    missing = len([e for e in entities if e["group"] >= len(settings)])
+    if(missing):
+        print("Warning: {} entities belong to color groups missing from the settings".format(missing), file=sys.stderr)
+
+    if(args.stats):
+        stats = collectStatistics(entities, settings, 1/unitFactor, margin, args.move_to_origin, args.exact_size)
+        print(formatStatistics(stats, bool(args.tile)))
+        return
+
+    document = os.path.splitext(os.path.basename(args.recording))[0]
+
+    if(args.tile):
+        os.makedirs(args.output, exist_ok=True)
+
+        tiles = tileEntities(entities, settings, args.tile[0] / 10, args.tile[1] / 10, args.overlap / 10, args.marks)
+        writeTiles(args.output, tiles, settings, 1/unitFactor, args.template, args.compress, args.workers, document=document)
+        return
+
+    converted = convertEntities(entities, settings, 1/unitFactor)
+
+    if(not args.split):
+        writeSVGFile(args.output, converted, settings, margin, args.move_to_origin, args.compress, scale=1/unitFactor)
+        return
+
+    outputMode = OUTPUT_PER_COLOR if args.split == "color" else OUTPUT_PER_BODY
+    extension = ".svgz" if args.compress else ".svg"
+
+    os.makedirs(args.output, exist_ok=True)
+
+    for name, batch in getBatches(converted, settings, outputMode, args.template, document=document):
+        writeSVGFile(os.path.join(args.output, name + extension), batch, settings, margin, args.move_to_origin, args.compress, scale=1/unitFactor)
+
+
+if __name__ == "__main__":
+    main()
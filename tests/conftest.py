@@ -0,0 +1,5 @@
+# ExportGeometry is a top level module of the add-in folder, not a package
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
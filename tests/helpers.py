@@ -0,0 +1,26 @@
+# Shared geometry for the tests
+import ExportGeometry as G
+
+
+SETTINGS = [["cut", "255", "0", "0", "0.1"], ["hatch", "0", "0", "255", "0.1", "10", "0"]]
+
+
+def square(x0, y0, x1, y1):
+    return [("line", x0, y0, x1, y0), ("line", x1, y0, x1, y1), ("line", x1, y1, x0, y1), ("line", x0, y1, x0, y0)]
+
+
+def body(group, loops, name="body"):
+    return {"group": group, "name": name, "closed": True, "loops": loops}
+
+
+def sketchCurve(group, record, name="sketch"):
+    area = G.loopSignedArea([(record, False)]) if G.isLoopClosed([(record, False)]) else 0
+    return {"group": group, "name": name, "closed": False, "loops": [{"isOuter": True, "area": area, "curves": [(record, False)]}]}
+
+
+def pathEnds(curves):
+    rtn = []
+    for c, f in curves:
+        sp, ep = G.getRecordEndPoints(c)
+        rtn.append((ep, sp) if f else (sp, ep))
+    return rtn
@@ -0,0 +1,26 @@
+import math
+
+import pytest
+
+import ExportGeometry as G
+
+
+def test_rotated_ellipse_bounds():
+    a, b, angle = 2, 1, math.radians(30)
+    bounds = G.newBounds()
+    G.expandBoundsByEllipse(bounds, (1, 2), (a * math.cos(angle), a * math.sin(angle)), (-b * math.sin(angle), b * math.cos(angle)))
+
+    w = math.sqrt((a * math.cos(angle))**2 + (b * math.sin(angle))**2)
+    h = math.sqrt((a * math.sin(angle))**2 + (b * math.cos(angle))**2)
+    assert bounds == pytest.approx([1 - w, 2 - h, 1 + w, 2 + h])
+
+
+def test_arc_bounds():
+    assert G.getRecordBounds(("arc", 0, 0, 1, 1, 0, 0, 1, math.pi / 2)) == pytest.approx([0, 0, 1, 1])
+    assert G.getRecordBounds(("arc", 0, 0, 1, 1, 0, 0, 1, -3 * math.pi / 2)) == pytest.approx([-1, -1, 1, 1])
+
+
+def test_empty_export_gets_fixed_canvas():
+    svg = G.buildSVG([], [["cut", "0", "0", "0", "1"]], scale=0.1)
+
+    assert "viewBox='0.000000 0.000000 500.000000 250.000000'" in svg
@@ -0,0 +1,46 @@
+import pytest
+
+import ExportGeometry as G
+from helpers import SETTINGS, square, body, sketchCurve
+
+
+def test_hatch_square_on_grid():
+    edges = [(r[1:3], r[3:5]) for r in square(0, 0, 10, 10)]
+    lines = G.hatchPolygons(edges, 1)
+
+    assert [s[1] for s, _ in lines] == pytest.approx([i + 0.5 for i in range(10)])
+
+    # Alternating directions
+    assert [s[0] < e[0] for s, e in lines] == [i % 2 == 0 for i in range(10)]
+    assert all(sorted([s[0], e[0]]) == pytest.approx([0, 10]) for s, e in lines)
+
+
+def test_hatch_skips_hole():
+    edges = [(r[1:3], r[3:5]) for r in square(0, 0, 10, 10) + square(4, 4, 6, 6)]
+    lines = G.hatchPolygons(edges, 1)
+
+    assert len(lines) == 12
+    assert not any(4 < s[1] < 6 and min(s[0], e[0]) < 5 < max(s[0], e[0]) for s, e in lines)
+
+
+def test_hatch_only_closed_loops():
+    u = sketchCurve(1, ("nurbs", 0, 10, 0, 0, 10, 0, 10, 10))
+    circle = sketchCurve(1, ("circle", 0, 0, 3))
+
+    converted = G.convertEntities([u, circle], SETTINGS)
+    assert len(converted[0][2]) == 1
+    assert len(converted[1][2]) == 2
+
+    assert G.addHatchLoop(u, SETTINGS) is u
+    assert len(G.addHatchLoop(circle, SETTINGS)["loops"]) == 2
+
+
+def test_hatch_lines_far_from_origin_stay_separate():
+    settings = [["hatch", "0", "0", "255", "0.1", "0.1", "0"]]
+    entity = body(0, [G.orientLoop(square(200, 200, 201, 201), True)])
+
+    outline, hatch = G.convertEntities([entity], settings)[0][2]
+    assert hatch.count("M") == hatch.count("L") == 100
+
+    stats = G.collectStatistics([entity], settings)
+    assert stats["groups"][0]["pierces"] == 101
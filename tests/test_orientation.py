@@ -0,0 +1,42 @@
+import math
+
+import pytest
+
+import ExportGeometry as G
+from helpers import square, sketchCurve, pathEnds
+
+
+@pytest.mark.parametrize("isOuter, area", [(True, -math.pi), (False, math.pi)])
+def test_two_arc_loop_area(isOuter, area):
+    # Upper half counterclockwise and lower half clockwise, both starting at (1, 0)
+    loop = G.orientLoop([("arc", 0, 0, 1, 1, 0, -1, 0, math.pi), ("arc", 0, 0, 1, 1, 0, -1, 0, -math.pi)], isOuter)
+
+    assert loop["area"] == pytest.approx(area)
+    assert G.loopSignedArea(loop["curves"]) == pytest.approx(area)
+
+    # Curves are lined up end to end
+    ends = pathEnds(loop["curves"])
+    for (_, ep), (sp, _) in zip(ends, ends[1:] + ends[:1]):
+        assert G.isPointClose(ep, sp)
+
+
+def test_square_area_is_independent_of_position():
+    for dx in (0, 100):
+        loop = G.orientLoop([("line", x0 + dx, y0, x1 + dx, y1) for _, x0, y0, x1, y1 in square(0, 0, 2, 3)], True)
+        assert loop["area"] == pytest.approx(-6)
+
+
+def test_closed_curve_area_follows_drawing_direction():
+    assert G.recordArea(("circle", 5, 5, 2)) == pytest.approx(-4 * math.pi)
+    assert G.recordArea(("ellipse", 0, 0, 3, 2, 1, 0)) == pytest.approx(6 * math.pi)
+    assert G.orientLoop([("circle", 5, 5, 2)], True)["curves"] == [(("circle", 5, 5, 2), False)]
+    assert G.orientLoop([("circle", 5, 5, 2)], False)["curves"] == [(("circle", 5, 5, 2), True)]
+
+
+def test_open_curves_have_no_area():
+    line = sketchCurve(0, ("line", 10, 0, 10, 10), "line")
+    circle = sketchCurve(0, ("circle", 0, 0, 3), "circle")
+
+    assert G.getEntityArea(line) == 0
+    assert G.getEntityArea(circle) == pytest.approx(9 * math.pi)
+    assert [e["name"] for e in G.orderEntities([line, circle], G.ORDER_AREA)] == ["line", "circle"]
@@ -0,0 +1,66 @@
+import gzip
+
+import pytest
+
+import ExportGeometry as G
+from helpers import SETTINGS, square, body, sketchCurve
+
+
+def converted():
+    return G.convertEntities([
+        body(0, [G.orientLoop(square(0, 0, 4, 3), True)], "Plate"),
+        sketchCurve(1, ("circle", 0, 0, 1), "Holes"),
+        body(1, [G.orientLoop(square(5, 0, 6, 1), True)], "Tab"),
+    ], SETTINGS)
+
+
+def test_batches_per_color():
+    batches = G.getBatches(converted(), SETTINGS, G.OUTPUT_PER_COLOR, "{document}_{group}_{index}", document="part")
+
+    assert [name for name, _ in batches] == ["part_cut_0", "part_hatch_1"]
+    assert [[e[1] for e in entities] for _, entities in batches] == [["Plate"], ["Holes", "Tab"]]
+
+
+def test_batches_per_body():
+    batches = G.getBatches(converted(), SETTINGS, G.OUTPUT_PER_BODY, "{group}_{name}_{index}")
+
+    assert [name for name, _ in batches] == ["cut_Plate_0", "hatch_Holes_1", "hatch_Tab_2"]
+    assert all(len(entities) == 1 for _, entities in batches)
+
+
+def test_batches_skip_empty_groups():
+    batches = G.getBatches(converted()[:1], SETTINGS, G.OUTPUT_PER_COLOR, "{group}")
+
+    assert [name for name, _ in batches] == ["cut"]
+
+
+def test_batches_per_body_keep_names_apart():
+    entities = converted() + converted()[:1]
+    batches = G.getBatches(entities, SETTINGS, G.OUTPUT_PER_BODY, "{name}")
+
+    assert [name for name, _ in batches] == ["Plate", "Holes", "Tab", "Plate_2"]
+
+
+@pytest.mark.parametrize("template", ["{group}_{row}", "{}", "{name", "{index:q}"])
+def test_batch_templates_are_checked(template):
+    with pytest.raises(ValueError):
+        G.getBatches(converted(), SETTINGS, G.OUTPUT_PER_COLOR, template, document="part")
+
+
+def test_template_check_accepts_fields():
+    G.checkTemplate("{document}_{row}_{column}_{index:>3}", G.TILE_TEMPLATE_FIELDS + ["document"])
+
+
+def test_filename_sanitising():
+    assert G.formatFilename("{document}_{name}", document="a/b", name=' Body: "1" ') == "a_b_Body_ _1_"
+    assert G.formatFilename("{name}", name='<>|?*\\') == "______"
+
+
+def test_compressed_file_round_trip(tmp_path):
+    filename = str(tmp_path / "part.svgz")
+    entities = converted()
+
+    G.writeSVGFile(filename, entities, SETTINGS, 1, True, True)
+
+    with gzip.open(filename, "rt", encoding="utf-8") as file:
+        assert file.read() == G.buildSVG(entities, SETTINGS, 1, True)
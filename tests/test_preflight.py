@@ -0,0 +1,32 @@
+import ExportGeometry as G
+from helpers import SETTINGS, square, body, sketchCurve
+
+
+def test_statistics_match_export():
+    entities = [body(1, [G.orientLoop(square(0, 0, 4, 3), True), G.orientLoop([("circle", 2, 1.5, 1)], False)])] * 3
+    stats = G.collectStatistics(entities, SETTINGS, 0.1, exactSize=True)
+    svg = G.buildSVG(G.convertEntities(entities, SETTINGS, 0.1), SETTINGS)
+
+    group = stats["groups"][1]
+    assert group["entities"] == 3
+    assert group["curves"]["line"] == 12 and group["curves"]["circle"] == 3
+    assert group["pierces"] == svg.count("M")
+    assert stats["size"] == len(svg.encode("utf-8"))
+
+
+def test_size_of_one_large_entity_is_sampled():
+    settings = [["engrave", "0", "0", "0", "0.1", "0.05", "30"]]
+    entities = [body(0, [G.orientLoop(square(0, 0, 10, 10), True)])]
+    stats = G.collectStatistics(entities, settings, 0.1)
+    svg = G.buildSVG(G.convertEntities(entities, settings, 0.1), settings)
+
+    assert stats["sampledCurves"] <= G.SIZE_SAMPLE_CURVES < stats["totalCurves"]
+    assert abs(stats["size"] / len(svg.encode("utf-8")) - 1) < 0.02
+    assert "estimated from" in G.formatStatistics(stats)
+
+
+def test_nurbs_point_limit_is_reported():
+    points = tuple(c for i in range(G.NURBS_MAX_POINTS) for c in (i * 0.001, 0))
+    stats = G.collectStatistics([sketchCurve(0, ("nurbs",) + points)], SETTINGS)
+
+    assert "reached the limit" in G.formatStatistics(stats)
@@ -0,0 +1,35 @@
+import math
+
+import pytest
+
+import ExportGeometry as G
+from helpers import SETTINGS, square, body, sketchCurve
+
+
+def test_recording_round_trip(tmp_path):
+    entities = [
+        body(1, [G.orientLoop(square(0, 0, 4, 3), True), G.orientLoop([("ellipse", 2, 1.5, 1, 0.5, 0.6, 0.8)], False)], "Körper"),
+        sketchCurve(0, ("ellarc", 0, 0, 2, 1, 1, 0, 2, 0, 0, 1, math.pi / 2)),
+        sketchCurve(0, ("nurbs", 0, 0, 1, 1, 2, 0)),
+    ]
+    filename = str(tmp_path / ("test" + G.RECORDING_EXTENSION))
+
+    G.saveRecording(filename, entities, SETTINGS)
+    loaded, settings = G.loadRecording(filename)
+
+    assert settings == SETTINGS
+    assert len(loaded) == len(entities)
+    for a, b in zip(loaded, entities):
+        assert (a["group"], a["name"], a["closed"]) == (b["group"], b["name"], b["closed"])
+        for la, lb in zip(a["loops"], b["loops"]):
+            assert la["curves"] == lb["curves"]
+            assert la["isOuter"] == lb["isOuter"]
+            assert la["area"] == pytest.approx(lb["area"])
+
+
+def test_recording_rejects_other_files(tmp_path):
+    filename = tmp_path / "other.svgrec"
+    filename.write_bytes(b"<svg/>")
+
+    with pytest.raises(ValueError):
+        G.loadRecording(str(filename))
@@ -0,0 +1,90 @@
+import math
+
+import pytest
+
+import ExportGeometry as G
+from helpers import SETTINGS, square, body, sketchCurve, pathEnds
+
+
+def test_clip_line():
+    assert G.clipRecord(("line", -1, 1, 3, 1), [0, 0, 2, 2]) == [("line", 0, 1, 2, 1)]
+    assert G.clipRecord(("line", -1, 3, 3, 3), [0, 0, 2, 2]) == []
+
+
+def test_clipped_circle_keeps_direction():
+    pieces = G.clipRecord(("circle", 0, 0, 2), [-5, -1, 5, 5])
+
+    assert all(p[0] == "arc" and p[-1] < 0 for p in pieces)
+    assert sum(G.recordLength(p) for p in pieces) == pytest.approx(2 * 4 * math.pi / 3)
+
+
+def test_tile_pieces_meet_at_borders():
+    entity = body(0, [G.orientLoop([("circle", 0, 0, 2)], True), G.orientLoop(square(-1, -1, 1, 1), False)])
+    tiles = G.tileEntities([entity], SETTINGS, 2, 2)
+
+    assert len(tiles) == 4
+
+    ends = []
+    length = 0
+    for row, column, rect, entities in tiles:
+        for l in entities[0]["loops"]:
+            area = 0
+            for (sp, ep), (c, f) in zip(pathEnds(l["curves"]), l["curves"]):
+                for x, y in (sp, ep):
+                    assert rect[0] - 1e-9 <= x <= rect[2] + 1e-9 and rect[1] - 1e-9 <= y <= rect[3] + 1e-9
+                ends += [sp, ep]
+                length += G.recordLength(c)
+                area += -G.recordArea(c) if f else G.recordArea(c)
+
+            # Pieces keep the orientation of their loop
+            assert (area < 0) == l["isOuter"]
+
+    assert length == pytest.approx(4 * math.pi + 8)
+
+    # Every clipped end is shared with a piece of the neighbouring tile
+    for p in ends:
+        assert sum(G.isPointClose(p, q, 1e-9) for q in ends) == 2
+
+
+def test_tile_nurbs_by_segment():
+    points = [c for i in range(201) for c in (i * 0.1, 3 * math.sin(i * 0.05))]
+    record = ("nurbs",) + tuple(points)
+    tiles = G.tileEntities([sketchCurve(0, record)], SETTINGS, 5, 5)
+
+    pieces = [c for _, _, _, entities in tiles for c, _ in entities[0]["loops"][0]["curves"]]
+    assert sum(G.recordLength(c) for c in pieces) == pytest.approx(G.recordLength(record))
+
+    # Segments inside one tile stay one polyline
+    assert len(pieces) < len(tiles) * 2
+
+
+def test_tile_overlap_must_be_smaller():
+    with pytest.raises(ValueError):
+        G.tileEntities([], SETTINGS, 2, 2, 2)
+
+
+def test_marks_avoid_material():
+    plate = body(0, [G.orientLoop(square(0, 0, 10, 10), True), G.orientLoop(square(3, 3, 7, 7), False)])
+    tiles = G.tileEntities([plate], SETTINGS, 6, 6, 2, True)
+
+    marks = [e for _, _, _, entities in tiles for e in entities if e["name"] == "marks"]
+    assert marks and all(e["group"] == len(SETTINGS) for e in marks)
+
+    # Only the cross in the hole is clear of the plate
+    centers = {((c[1] + c[3]) / 2, c[2]) for e in marks for l in e["loops"] for c, _ in l["curves"] if c[2] == c[4]}
+    assert centers == {(5, 5)}
+
+
+def test_marks_avoid_crossing_edges():
+    plate = body(0, [G.orientLoop(square(0, 0, 10, 10), True), G.orientLoop(square(4.8, 3, 7, 7), False)])
+    tiles = G.tileEntities([plate], SETTINGS, 6, 6, 2, True)
+
+    assert not any(e["name"] == "marks" for _, _, _, entities in tiles for e in entities)
+
+
+def test_marks_are_written_in_their_own_group(tmp_path):
+    plate = body(0, [G.orientLoop(square(0, 0, 10, 10), True), G.orientLoop(square(3, 3, 7, 7), False)])
+    tiles = G.tileEntities([plate], SETTINGS, 6, 6, 2, True)
+    files = G.writeTiles(str(tmp_path), tiles, SETTINGS, template="{name}")
+
+    assert any("id='{}_".format(G.MARKS_SETTING[0]) in open(f).read() for f in files)